@@ -0,0 +1,173 @@
+"""
+Playwright 浏览器池基准
+
+在本机启动一个静态 HTTP 服务器，页面正文由 JS 渲染，并引用图片、字体和视频。
+验证：
+- 浏览器池能拿到 JS 渲染后的正文，且通过本地解析的质量检查
+- 图片 / 字体 / 媒体请求被拦截，没有打到服务器
+- 并发页面数不超过 PLAYWRIGHT_MAX_PAGES
+并对比"每个 URL 启动一次浏览器"的耗时
+
+用法（需要先执行 playwright install chromium）:
+    python benchmarks/bench_browser_pool.py --pages 20 --max-pages 4
+    python benchmarks/bench_browser_pool.py --pages 10 --compare-launch
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.crawler.browser_pool import BrowserPool, HAS_PLAYWRIGHT
+from src.crawler.html_to_markdown import convert_html, check_quality
+
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>JS 渲染页面 {index}</title>
+<style>@font-face {{ font-family: Demo; src: url("/static/demo.woff2"); }} body {{ font-family: Demo; }}</style>
+</head>
+<body>
+<div id="root"></div>
+<img src="/static/hero.png" alt="hero">
+<video src="/static/intro.mp4" autoplay muted></video>
+<script>
+  const root = document.getElementById("root");
+  const sections = [];
+  for (let i = 1; i <= 6; i++) {{
+    sections.push(`<section><h2>功能 ${{i}}</h2><p>页面 {index} 的第 ${{i}} 项功能：` +
+      `由 JavaScript 在浏览器中渲染的正文内容，静态抓取时看不到这些文字。</p></section>`);
+  }}
+  setTimeout(() => {{ root.innerHTML = "<main><h1>产品介绍</h1>" + sections.join("") + "</main>"; }}, 50);
+</script>
+</body></html>
+"""
+
+
+class CountingHandler(SimpleHTTPRequestHandler):
+    """记录每类静态资源被请求的次数"""
+
+    counter = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        with self.lock:
+            self.counter[Path(self.path).suffix or "/"] += 1
+        if self.path.startswith("/static/"):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(root: Path):
+    handler = partial(CountingHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def bench_pool(urls, max_pages: int, workers: int):
+    pool = BrowserPool(max_pages=max_pages)
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def render(url):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            start = time.perf_counter()
+            rendered = pool.render(url, wait_until="load", wait_selector="main")
+            elapsed = time.perf_counter() - start
+        finally:
+            with lock:
+                active -= 1
+        page = convert_html(rendered["html"], rendered["url"])
+        return elapsed, check_quality(page)
+
+    try:
+        start = time.perf_counter()
+        pool.render(urls[0], wait_until="load", wait_selector="main")  # 预热：启动浏览器
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(render, urls))
+        total = time.perf_counter() - start
+    finally:
+        stats = pool.stats()
+        pool.close()
+
+    failures = [reason for _, reason in results if reason]
+    print(f"浏览器池: 启动 {startup:.2f}s，{len(urls)} 个页面共 {total:.2f}s "
+          f"({len(urls) / total:.1f} 页/秒)，质量检查失败 {len(failures)} 个")
+    print(f"  调用方并发峰值 {peak}（页面并发上限 {max_pages}），拦截请求 {stats['blocked_requests']} 个")
+    return not failures
+
+
+def bench_launch_per_url(urls):
+    from playwright.sync_api import sync_playwright
+
+    start = time.perf_counter()
+    with sync_playwright() as p:
+        for url in urls:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.goto(url, wait_until="load")
+            page.wait_for_selector("main")
+            page.content()
+            browser.close()
+    total = time.perf_counter() - start
+    print(f"逐个启动浏览器: {len(urls)} 个页面共 {total:.2f}s ({len(urls) / total:.1f} 页/秒)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Playwright 浏览器池基准")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--max-pages", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=8, help="调用方线程数")
+    parser.add_argument("--compare-launch", action="store_true", help="对比每个 URL 启动一次浏览器")
+    args = parser.parse_args()
+
+    if not HAS_PLAYWRIGHT:
+        print("未安装 playwright: pip install playwright && playwright install chromium")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for i in range(args.pages):
+            (root / f"page{i}.html").write_text(PAGE.format(index=i), encoding="utf-8")
+
+        server = start_server(root)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = [f"{base}/page{i}.html" for i in range(args.pages)]
+
+        try:
+            ok = bench_pool(urls, args.max_pages, args.workers)
+            blocked = {ext: CountingHandler.counter[ext] for ext in (".png", ".woff2", ".mp4")}
+            print(f"  服务器收到的资源请求: {blocked}")
+            ok &= not any(blocked.values())
+
+            if args.compare_launch:
+                bench_launch_per_url(urls)
+        finally:
+            server.shutdown()
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+竞品名称去重微基准
+
+对比原始 O(n²) 逐对 fuzz.ratio 与分块 + cdist + 并查集的去重引擎
+
+用法:
+    python benchmarks/bench_dedup.py --sizes 100 500 1000 5000
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fuzzywuzzy import fuzz
+
+from src.discovery.dedup import CompetitorDeduplicator, HAS_RAPIDFUZZ
+
+
+BASE_NAMES = ["Notion", "Jasper", "Copy.ai", "秘塔写作猫", "文心一言", "讯飞星火", "Writesonic", "Grammarly"]
+
+
+def make_candidates(size: int, seed: int = 42):
+    """生成带拼写变体的候选名称"""
+    rng = random.Random(seed)
+    bases = list(BASE_NAMES)
+    while len(bases) < size // 3:
+        bases.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12))).title())
+    
+    candidates = []
+    for _ in range(size):
+        name = rng.choice(bases)
+        variant = rng.random()
+        if variant < 0.2:
+            name = name.lower()
+        elif variant < 0.4:
+            name = f" {name} "
+        elif variant < 0.5 and len(name) > 4:
+            i = rng.randrange(len(name))
+            name = name[:i] + name[i + 1:]
+        candidates.append({"name": name, "confidence": round(rng.random(), 2)})
+    return candidates
+
+
+def legacy_deduplicate(competitors):
+    """原始实现：逐对比较，先到先得"""
+    unique = []
+    for comp in competitors:
+        comp_name = comp["name"].lower().strip()
+        for existing in unique:
+            if fuzz.ratio(comp_name, existing["name"].lower().strip()) > 85:
+                existing["confidence"] = max(existing.get("confidence", 0), comp.get("confidence", 0))
+                break
+        else:
+            unique.append(dict(comp))
+    return unique
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="竞品名称去重微基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 1000, 2000, 5000])
+    parser.add_argument("--legacy-max", type=int, default=2000, help="原始实现最多测试的规模（太慢）")
+    args = parser.parse_args()
+    
+    engine = CompetitorDeduplicator()
+    print(f"rapidfuzz: {'是' if HAS_RAPIDFUZZ else '否（退回 fuzzywuzzy）'}")
+    print(f"{'候选数':>8} | {'原始(s)':>10} | {'新引擎(s)':>10} | {'原始结果':>8} | {'新结果':>8}")
+    
+    for size in args.sizes:
+        candidates = make_candidates(size)
+        
+        new_result, new_time = timed(engine.deduplicate, candidates)
+        
+        if size <= args.legacy_max:
+            legacy_result, legacy_time = timed(legacy_deduplicate, candidates)
+            legacy_cell, legacy_count = f"{legacy_time:10.3f}", f"{len(legacy_result):8d}"
+        else:
+            legacy_cell, legacy_count = f"{'-':>10}", f"{'-':>8}"
+        
+        print(f"{size:>8} | {legacy_cell} | {new_time:10.3f} | {legacy_count} | {len(new_result):8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+本地解析策略基准
+
+在本机启动一个静态 HTTP 服务器，提供几类典型页面（静态定价页、功能页、
+只有 JS 外壳的单页应用、导航链接页），测量本地 HTML → Markdown 策略的
+耗时和质量检查结果；静态页应通过，JS 外壳和链接页应降级到远程策略
+
+用法:
+    python benchmarks/bench_local_crawl.py --rounds 50
+    python benchmarks/bench_local_crawl.py --urls https://example.com/pricing  # 额外对比真实页面与 Jina Reader
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.crawler.url_crawler import URLCrawler
+from src.crawler.html_to_markdown import convert_html
+
+
+NAV = """
+<header><nav>
+  <a href="/">首页</a><a href="/features.html">功能</a><a href="/pricing.html">定价</a>
+  <a href="/blog">博客</a><a href="/login">登录</a>
+</nav></header>
+"""
+
+FOOTER = """
+<footer><a href="/about">关于我们</a> · <a href="/privacy">隐私政策</a> · © 2026 Example Inc.</footer>
+"""
+
+
+def pricing_page() -> str:
+    plans = [("免费版", "¥0", "3 个项目"), ("专业版", "¥99/月", "无限项目"), ("团队版", "¥299/月", "团队协作")]
+    rows = "\n".join(
+        f"<tr><td class='plan-name'><strong>{name}</strong></td><td class='price'>{price}</td>"
+        f"<td class='limit'>{limit}</td></tr>"
+        for name, price, limit in plans
+    )
+    faq = "\n".join(
+        f"<h3>问题 {i}：如何升级套餐？</h3><p>在账户设置中选择新的套餐即可，费用按剩余天数折算，"
+        f"升级立即生效，降级在当前计费周期结束后生效。</p>"
+        for i in range(1, 6)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>定价 - Example AI 写作助手</title>
+<meta name="description" content="Example AI 的价格方案">
+<style>body {{ font-family: sans-serif; }}</style>
+<script>window.dataLayer = [];</script></head>
+<body>{NAV}
+<main>
+  <h1>简单透明的价格</h1>
+  <p>所有套餐均包含 AI 续写、润色、翻译和 <a href="/templates">200+ 模板</a>。</p>
+  <table><tr><th>套餐</th><th>价格</th><th>额度</th></tr>{rows}</table>
+  <img src="/static/pricing.png" alt="价格对比图">
+  <h2>常见问题</h2>{faq}
+</main>{FOOTER}</body></html>"""
+
+
+def features_page() -> str:
+    sections = "\n".join(
+        f"<section class='feature'><h2>功能 {i}</h2><p>Example AI 的第 {i} 项核心能力："
+        f"根据上下文自动生成高质量段落，支持中文、英文等 20 种语言，并可按品牌语气调整输出风格。</p>"
+        f"<ul><li>一键生成</li><li>多语言支持</li><li>团队共享<ul><li>权限管理</li></ul></li></ul></section>"
+        for i in range(1, 8)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>功能 - Example AI</title></head>
+<body>{NAV}<article><h1>产品功能</h1>{sections}</article>{FOOTER}</body></html>"""
+
+
+def spa_page() -> str:
+    return """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Example App</title>
+<script src="/static/app.3f9a1c.js" defer></script></head>
+<body><noscript>You need to enable JavaScript to run this app.</noscript><div id="root"></div></body></html>"""
+
+
+def links_page() -> str:
+    links = "\n".join(f"<li><a href='/docs/{i}'>文档页面 {i} 的标题</a></li>" for i in range(200))
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>文档目录</title></head>
+<body><div class="sidebar"><ul>{links}</ul></div></body></html>"""
+
+
+PAGES = {
+    "pricing.html": (pricing_page, True),
+    "features.html": (features_page, True),
+    "spa.html": (spa_page, False),
+    "links.html": (links_page, False),
+}
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(root: Path):
+    handler = partial(QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def bench_local_server(crawler: URLCrawler, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for name, (render, _) in PAGES.items():
+            (root / name).write_text(render(), encoding="utf-8")
+
+        server = start_server(root)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+
+        print(f"{'页面':<16}{'预期':>6}{'结果':>6}{'p50 ms':>10}{'p95 ms':>10}{'转换 ms':>10}  说明")
+        all_ok = True
+        try:
+            for name, (render, expected) in PAGES.items():
+                url = f"{base}/{name}"
+                timings = []
+                result = None
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    result = crawler._crawl_locally(url)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                html = render()
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    convert_html(html, url)
+                convert_ms = (time.perf_counter() - start) * 1000 / rounds
+
+                passed = result["success"]
+                all_ok &= passed == expected
+                note = f"{len(result['content'])} 字符 Markdown" if passed else result["error"]
+                print(
+                    f"{name:<16}{'通过' if expected else '降级':>6}{'通过' if passed else '降级':>6}"
+                    f"{statistics.median(timings):>10.2f}{percentile(timings, 95):>10.2f}{convert_ms:>10.2f}  {note}"
+                )
+        finally:
+            server.shutdown()
+
+    print(f"\n质量检查{'全部符合预期' if all_ok else '存在不符合预期的页面'}")
+    return all_ok
+
+
+def bench_remote(crawler: URLCrawler, urls):
+    print(f"\n{'URL':<50}{'本地 ms':>10}{'Jina ms':>10}  本地结果")
+    for url in urls:
+        start = time.perf_counter()
+        local = crawler._crawl_locally(url)
+        local_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        crawler._crawl_with_jina(url)
+        jina_ms = (time.perf_counter() - start) * 1000
+
+        note = f"{len(local['content'])} 字符" if local["success"] else local["error"]
+        print(f"{url[:48]:<50}{local_ms:>10.0f}{jina_ms:>10.0f}  {note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地解析策略基准")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--urls", nargs="*", default=[], help="额外对比的真实页面（会请求 Jina Reader）")
+    args = parser.parse_args()
+
+    crawler = URLCrawler()
+    ok = bench_local_server(crawler, args.rounds)
+    if args.urls:
+        bench_remote(crawler, args.urls)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,12 @@ def main():
   # 初始化数据库
   python main.py init-db
   
+  # 搜索缓存维护（清理过期记录，预热热门查询，每 60 分钟执行一次）
+  python main.py cache-maintain --prewarm 20 --interval 60
+  
+  # 爬取 worker（把 24 小时未爬取的数据源加入队列后开始爬取，可多进程同时运行）
+  python main.py crawl-worker --enqueue --stale-hours 24
+  
   # 启动 Web 界面
   python main.py web
         """
@@ -50,6 +56,23 @@ def main():
     # init-db 命令
     subparsers.add_parser("init-db", help="初始化数据库")
     
+    # cache-maintain 命令
+    cache_parser = subparsers.add_parser("cache-maintain", help="搜索缓存维护（清理/统计/预热）")
+    cache_parser.add_argument("--chunk-size", type=int, default=500, help="每批删除的过期记录数 (默认: 500)")
+    cache_parser.add_argument("--prewarm", type=int, default=0, help="预热命中最多的 N 条即将过期查询 (默认: 0 不预热)")
+    cache_parser.add_argument("--prewarm-window", type=int, default=24, help="预热窗口，单位小时 (默认: 24)")
+    cache_parser.add_argument("--vacuum", action="store_true", help="清理后压缩 SQLite 数据库文件")
+    cache_parser.add_argument("--interval", type=int, default=0, help="定时执行间隔，单位分钟 (默认: 0 只执行一次)")
+    
+    # crawl-worker 命令
+    worker_parser = subparsers.add_parser("crawl-worker", help="从持久化队列领取并爬取数据源（可中断续爬）")
+    worker_parser.add_argument("--enqueue", action="store_true", help="先把过期未爬取的数据源加入队列")
+    worker_parser.add_argument("--stale-hours", type=float, default=24, help="超过多少小时未爬取视为过期 (默认: 24)")
+    worker_parser.add_argument("--batch", type=int, default=0, help="每次领取的 URL 数 (默认: 并发数)")
+    worker_parser.add_argument("--max-items", type=int, default=0, help="最多处理的 URL 数 (默认: 0 不限)")
+    worker_parser.add_argument("--wait", type=float, default=0, help="队列为空时等待秒数后继续 (默认: 0 直接退出)")
+    worker_parser.add_argument("--stats", action="store_true", help="只显示队列状态")
+    
     # web 命令
     web_parser = subparsers.add_parser("web", help="启动 Web 界面")
     web_parser.add_argument("--port", type=int, default=8501, help="端口号 (默认: 8501)")
@@ -94,6 +117,48 @@ def main():
         analyzer = CompetitorAnalyzer()
         result = analyzer.analyze_from_config(args.config_file)
     
+    elif args.command == "cache-maintain":
+        from src.discovery.cache_maintenance import run_cache_maintenance
+        
+        def job():
+            run_cache_maintenance(
+                chunk_size=args.chunk_size,
+                prewarm_top=args.prewarm,
+                prewarm_window_hours=args.prewarm_window,
+                vacuum=args.vacuum
+            )
+        
+        job()
+        
+        if args.interval > 0:
+            from apscheduler.schedulers.blocking import BlockingScheduler
+            
+            print(f"⏰ 每 {args.interval} 分钟执行一次缓存维护 (Ctrl+C 退出)")
+            scheduler = BlockingScheduler()
+            scheduler.add_job(job, "interval", minutes=args.interval)
+            try:
+                scheduler.start()
+            except (KeyboardInterrupt, SystemExit):
+                pass
+    
+    elif args.command == "crawl-worker":
+        from src.crawler.frontier import CrawlFrontierStore, CrawlWorker
+        
+        frontier = CrawlFrontierStore()
+        
+        if not args.stats:
+            if args.enqueue:
+                added = frontier.enqueue_data_sources(stale_hours=args.stale_hours)
+                print(f"📥 加入队列: {added} 个数据源")
+            
+            CrawlWorker(frontier=frontier).run(
+                batch_size=args.batch or None,
+                max_items=args.max_items,
+                wait=args.wait
+            )
+        
+        print(f"📊 队列状态: {frontier.stats()}")
+    
     elif args.command == "web":
         print(f"🌐 启动 Web 界面... (端口: {args.port})")
         print("⚠️  Web 界面尚未实现，请使用命令行模式")
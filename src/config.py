@@ -3,7 +3,7 @@
 """
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -41,15 +41,93 @@ class Config:
     DEFAULT_LLM_TEMPERATURE = float(os.getenv("DEFAULT_LLM_TEMPERATURE", "0.3"))
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "4000"))
     
+    # 竞品发现（融合所有查询结果后批量提取）
+    DISCOVERY_RRF_K = int(os.getenv("DISCOVERY_RRF_K", "60"))
+    DISCOVERY_CONTEXT_TOKEN_BUDGET = int(os.getenv("DISCOVERY_CONTEXT_TOKEN_BUDGET", "3000"))  # 单次 LLM 调用的搜索结果 token 预算
+    DISCOVERY_MAX_LLM_CALLS = int(os.getenv("DISCOVERY_MAX_LLM_CALLS", "3"))
+    DISCOVERY_WAVE_SIZE = int(os.getenv("DISCOVERY_WAVE_SIZE", "2"))  # 流式发现每批执行的查询数
+    DISCOVERY_CONFIDENCE_THRESHOLD = float(os.getenv("DISCOVERY_CONFIDENCE_THRESHOLD", "0.7"))  # 确认竞品的最低置信度
+    
     # 搜索配置
     DEFAULT_SEARCH_ENGINE = os.getenv("DEFAULT_SEARCH_ENGINE", "serper")
     SEARCH_RESULTS_PER_QUERY = int(os.getenv("SEARCH_RESULTS_PER_QUERY", "10"))
     CACHE_EXPIRY_DAYS = int(os.getenv("CACHE_EXPIRY_DAYS", "7"))
+    SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "5"))
+    SERPER_BATCH_SIZE = int(os.getenv("SERPER_BATCH_SIZE", "100"))  # 单次批量请求的最大查询数
+    
+    # 进程内搜索缓存（LRU 容量 / TTL 秒 / 空结果负缓存 TTL 秒 / 命中计数批量写回阈值）
+    SEARCH_MEMORY_CACHE_SIZE = int(os.getenv("SEARCH_MEMORY_CACHE_SIZE", "1000"))
+    SEARCH_MEMORY_CACHE_TTL = int(os.getenv("SEARCH_MEMORY_CACHE_TTL", "3600"))
+    SEARCH_NEGATIVE_CACHE_TTL = int(os.getenv("SEARCH_NEGATIVE_CACHE_TTL", "600"))
+    SEARCH_HIT_FLUSH_THRESHOLD = int(os.getenv("SEARCH_HIT_FLUSH_THRESHOLD", "50"))
+    
+    # 搜索限流（令牌桶：每秒请求数 / 突发容量，速率<=0 表示不限流）
+    SERPER_RATE_LIMIT = float(os.getenv("SERPER_RATE_LIMIT", "5"))
+    SERPER_RATE_BURST = int(os.getenv("SERPER_RATE_BURST", "5"))
+    GOOGLE_RATE_LIMIT = float(os.getenv("GOOGLE_RATE_LIMIT", "2"))
+    GOOGLE_RATE_BURST = int(os.getenv("GOOGLE_RATE_BURST", "2"))
+    
+    # 对冲请求（首选引擎超过历史延迟百分位未返回时请求备用引擎，单位：秒）
+    SEARCH_HEDGE_PERCENTILE = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "95"))
+    SEARCH_HEDGE_MIN_SAMPLES = int(os.getenv("SEARCH_HEDGE_MIN_SAMPLES", "5"))
+    SEARCH_HEDGE_DEFAULT_DELAY = float(os.getenv("SEARCH_HEDGE_DEFAULT_DELAY", "3"))
+    SEARCH_HEDGE_MIN_DELAY = float(os.getenv("SEARCH_HEDGE_MIN_DELAY", "0.5"))
+    
+    # 熔断（连续失败次数 / 冷却秒数）
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_BREAKER_COOLDOWN = float(os.getenv("CIRCUIT_BREAKER_COOLDOWN", "60"))
     
     # 采集配置
     MAX_CONCURRENT_CRAWLS = int(os.getenv("MAX_CONCURRENT_CRAWLS", "5"))
+    MAX_CRAWLS_PER_HOST = int(os.getenv("MAX_CRAWLS_PER_HOST", "2"))  # 同一主机的最大并发爬取数
+    IMAGE_MAX_COUNT = int(os.getenv("IMAGE_MAX_COUNT", "20"))  # 每个页面最多下载的图片数
+    IMAGE_DOWNLOAD_WORKERS = int(os.getenv("IMAGE_DOWNLOAD_WORKERS", "8"))
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))  # 单张图片大小上限
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
+    CRAWL_CACHE_TTL = int(os.getenv("CRAWL_CACHE_TTL", "86400"))  # 爬取结果直接复用的秒数，0 表示不使用缓存
+    CRAWL_VALIDATE_TIMEOUT = int(os.getenv("CRAWL_VALIDATE_TIMEOUT", "10"))  # 条件请求校验的超时
+    CRAWL_TIER_SKIP_FAILURES = int(os.getenv("CRAWL_TIER_SKIP_FAILURES", "3"))  # 某域名连续失败多少次后跳过该策略
+    CRAWL_TIER_RETRY_INTERVAL = int(os.getenv("CRAWL_TIER_RETRY_INTERVAL", "21600"))  # 被跳过的策略隔多少秒再试一次
     RETRY_TIMES = int(os.getenv("RETRY_TIMES", "3"))
+    CRAWL_LEASE_SECONDS = int(os.getenv("CRAWL_LEASE_SECONDS", "600"))  # 爬取队列租约时长，worker 崩溃后过期可被重新领取
+    CRAWL_RETRY_BACKOFF = float(os.getenv("CRAWL_RETRY_BACKOFF", "60"))  # 首次重试等待秒数，之后指数增长
+    CRAWL_RETRY_BACKOFF_MAX = float(os.getenv("CRAWL_RETRY_BACKOFF_MAX", "3600"))
+    
+    # 本地解析（静态页面直接抓取 HTML 转 Markdown）
+    LOCAL_CRAWL_ENABLED = os.getenv("LOCAL_CRAWL_ENABLED", "true").lower() == "true"
+    LOCAL_MIN_CONTENT_LENGTH = int(os.getenv("LOCAL_MIN_CONTENT_LENGTH", "300"))  # 正文最少字符数
+    LOCAL_MIN_TEXT_DENSITY = float(os.getenv("LOCAL_MIN_TEXT_DENSITY", "0.05"))  # 正文字符数 / HTML 长度
+    LOCAL_MAX_LINK_DENSITY = float(os.getenv("LOCAL_MAX_LINK_DENSITY", "0.6"))  # 链接文字占正文的最大比例
+    LOCAL_MAX_HTML_BYTES = int(os.getenv("LOCAL_MAX_HTML_BYTES", str(5 * 1024 * 1024)))
+    
+    # Firecrawl 批量抓取
+    FIRECRAWL_BATCH_SIZE = int(os.getenv("FIRECRAWL_BATCH_SIZE", "50"))  # 每个批量任务的最大 URL 数
+    FIRECRAWL_BATCH_WINDOW = float(os.getenv("FIRECRAWL_BATCH_WINDOW", "0.5"))  # 攒批等待秒数
+    FIRECRAWL_POLL_INTERVAL = float(os.getenv("FIRECRAWL_POLL_INTERVAL", "2"))  # 任务状态轮询间隔
+    FIRECRAWL_BATCH_TIMEOUT = float(os.getenv("FIRECRAWL_BATCH_TIMEOUT", "180"))  # 批量任务最长等待秒数
+    FIRECRAWL_RESULT_TTL = float(os.getenv("FIRECRAWL_RESULT_TTL", "600"))  # 预取结果未被取走时保留的秒数
+    FIRECRAWL_PREFETCH_MIN_REACH = float(os.getenv("FIRECRAWL_PREFETCH_MIN_REACH", "0.6"))  # 前序策略都失败的概率达到此值才预取
+    
+    # Playwright 浏览器池（JS 渲染页面的兜底策略）
+    PLAYWRIGHT_ENABLED = os.getenv("PLAYWRIGHT_ENABLED", "true").lower() == "true"
+    PLAYWRIGHT_BROWSERS = int(os.getenv("PLAYWRIGHT_BROWSERS", "1"))
+    PLAYWRIGHT_CONTEXTS_PER_BROWSER = int(os.getenv("PLAYWRIGHT_CONTEXTS_PER_BROWSER", "2"))
+    PLAYWRIGHT_MAX_PAGES = int(os.getenv("PLAYWRIGHT_MAX_PAGES", "4"))  # 同时打开的页面数上限
+    PLAYWRIGHT_CONTEXT_MAX_PAGES = int(os.getenv("PLAYWRIGHT_CONTEXT_MAX_PAGES", "50"))  # 上下文处理多少页面后重建
+    PLAYWRIGHT_WAIT_UNTIL = os.getenv("PLAYWRIGHT_WAIT_UNTIL", "networkidle")  # load/domcontentloaded/networkidle/commit
+    PLAYWRIGHT_WAIT_SELECTOR = os.getenv("PLAYWRIGHT_WAIT_SELECTOR", "")  # 额外等待出现的 CSS 选择器
+    PLAYWRIGHT_EXTRA_WAIT_MS = int(os.getenv("PLAYWRIGHT_EXTRA_WAIT_MS", "0"))
+    PLAYWRIGHT_TIMEOUT = float(os.getenv("PLAYWRIGHT_TIMEOUT", "30"))
+    PLAYWRIGHT_BLOCK_RESOURCES = [
+        t.strip() for t in os.getenv("PLAYWRIGHT_BLOCK_RESOURCES", "image,font,media").split(",") if t.strip()
+    ]
+    
+    # HTTP 连接池（backend: requests/httpx，HTTP/2 需要 httpx + h2）
+    HTTP_BACKEND = os.getenv("HTTP_BACKEND", "requests")
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))  # 缓存连接池的主机数
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # 每个主机的最大连接数
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
     
     @classmethod
     def validate(cls) -> bool:
@@ -79,6 +157,18 @@ class Config:
             return cls.BING_SEARCH_API_KEY
         
         return None
+    
+    @classmethod
+    def get_search_rate_limit(cls, engine: Optional[str] = None) -> Tuple[float, int]:
+        """获取搜索引擎限流参数 (每秒请求数, 突发容量)"""
+        engine = engine or cls.DEFAULT_SEARCH_ENGINE
+        
+        if engine == "serper":
+            return cls.SERPER_RATE_LIMIT, cls.SERPER_RATE_BURST
+        elif engine == "google":
+            return cls.GOOGLE_RATE_LIMIT, cls.GOOGLE_RATE_BURST
+        
+        return 0.0, 1
 
 
 # 导出配置实例
@@ -9,8 +9,11 @@ from datetime import datetime
 from src.config import config
 from src.discovery.discoverer import CompetitorDiscoverer
 from src.crawler.url_crawler import URLCrawler
+from src.crawler.crawl_plan import CrawlPlan
+from src.crawler.frontier import CrawlFrontierStore, CrawlWorker
 from src.analysis.extractor import InformationExtractor, ComparisonAnalyzer
 from src.database import Competitor, DataSource, RawContent, ParsedData, SessionLocal
+from src.utils.http_client import get_http_client
 
 
 class CompetitorAnalyzer:
@@ -19,6 +22,7 @@ class CompetitorAnalyzer:
     def __init__(self):
         self.discoverer = CompetitorDiscoverer()
         self.crawler = URLCrawler()
+        self.frontier = CrawlFrontierStore()
         self.extractor = InformationExtractor()
         self.comparator = ComparisonAnalyzer()
     
@@ -77,6 +81,7 @@ class CompetitorAnalyzer:
         print("\n" + "="*80)
         print("✅ 分析完成！")
         print(f"📊 报告路径: {report_path}")
+        get_http_client().print_stats()
         print("="*80 + "\n")
         
         return {
@@ -93,33 +98,65 @@ class CompetitorAnalyzer:
         pass
     
     def _crawl_competitors(self, competitors: List[Dict]) -> List[Dict]:
-        """爬取竞品数据"""
-        results = []
+        """
+        爬取竞品数据
+        
+        先把所有竞品的数据源汇总成一个爬取计划，按规范 URL 去重，
+        每个 URL 只爬取一次，结果共享给所有请求它的竞品。
+        计划中的 URL 写入持久化爬取队列，再由本进程的 worker 领取爬取：
+        与 crawl-worker 共享租约（不会重复爬取），中断后未完成的 URL 留在队列中可继续
+        """
+        plan = CrawlPlan()
+        queue_tasks = []
+        crawl_competitors = []
         
-        for i, comp in enumerate(competitors, 1):
+        for comp in competitors:
             comp_name = comp["name"]
-            print(f"\n[{i}/{len(competitors)}] 爬取 {comp_name}")
             
             # 获取数据源
             data_sources = comp.get("data_sources", [])
             if not data_sources:
-                print(f"  ⚠️  没有数据源，跳过")
+                print(f"  ⚠️  {comp_name} 没有数据源，跳过")
                 continue
             
             # 爬取前3个高优先级数据源
-            urls_to_crawl = [
-                ds["url"] for ds in sorted(
-                    data_sources, 
-                    key=lambda x: x["priority"]
-                )[:3]
-            ]
-            
-            crawl_results = self.crawler.batch_crawl(urls_to_crawl, comp_name)
-            
+            for ds in sorted(data_sources, key=lambda x: x["priority"])[:3]:
+                if plan.add(ds["url"], comp_name):
+                    queue_tasks.append({
+                        "url": ds["url"],
+                        "competitor_name": comp_name,
+                        "priority": -(ds.get("priority") or 0),
+                    })
+            crawl_competitors.append(comp)
+        
+        tasks = plan.tasks()
+        print(f"\n📋 爬取计划: {plan.requested} 个请求，去重后 {len(tasks)} 个 URL")
+        
+        # 本次要分析的 URL 即使已爬取过也重新排队
+        self.frontier.enqueue(queue_tasks, requeue=True)
+        
+        # 所有竞品的 URL 一起领取、并发爬取
+        worker = CrawlWorker(self.crawler, self.frontier)
+        worker.run(
+            urls=[task["canonical_url"] for task in tasks],
+            on_result=lambda item, result: plan.set_result(item["url"], result)
+        )
+        
+        # 等待退避重试或正被其他 worker 处理的 URL 留在队列中
+        for task in tasks:
+            if plan.result(task["canonical_url"]) is None:
+                plan.set_result(task["canonical_url"], {
+                    "success": False,
+                    "url": task["url"],
+                    "error": "仍在爬取队列中，稍后由 crawl-worker 继续处理"
+                })
+        
+        results = []
+        for comp in crawl_competitors:
             results.append({
-                "competitor": comp_name,
+                "competitor": comp["name"],
                 "confidence": comp.get("confidence", 0.8),
-                "crawl_results": crawl_results
+                "crawl_results": plan.results_for(comp["name"])
             })
         
         return results
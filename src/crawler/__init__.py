@@ -2,5 +2,29 @@
 Crawler 模块
 """
 from .url_crawler import URLCrawler, PlatformIdentifier
+from .url_utils import canonicalize_url
+from .crawl_plan import CrawlPlan
+from .blob_store import BlobStore
+from .tier_router import TierRouter
+from .html_to_markdown import convert_html, check_quality
+from .browser_pool import BrowserPool, BrowserPoolError, get_browser_pool
+from .firecrawl_client import FirecrawlBatchClient, get_firecrawl_client
+from .frontier import CrawlFrontierStore, CrawlWorker
 
-__all__ = ["URLCrawler", "PlatformIdentifier"]
+__all__ = [
+    "URLCrawler",
+    "PlatformIdentifier",
+    "canonicalize_url",
+    "CrawlPlan",
+    "BlobStore",
+    "TierRouter",
+    "convert_html",
+    "check_quality",
+    "BrowserPool",
+    "BrowserPoolError",
+    "get_browser_pool",
+    "FirecrawlBatchClient",
+    "get_firecrawl_client",
+    "CrawlFrontierStore",
+    "CrawlWorker",
+]
@@ -0,0 +1,127 @@
+"""
+内容寻址存储
+
+Markdown 和图片按内容的 SHA-256 存为 DATA_DIR/blobs/<hash><ext>，
+相同内容只存一份；每次爬取的目录只保存指向 blob 的硬链接和 meta.json；
+refs/ 下按来源 URL 的哈希保存指向 blob 的指针文件，跨进程复用已下载的内容
+"""
+import os
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+
+def _default_file_mode() -> int:
+    """普通 open() 新建文件的权限（0666 去掉 umask）"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# mkstemp 创建的临时文件是 0600，落盘前改回普通文件的权限
+# （umask 只能先设后读，在导入时取一次，避免多线程下临时改动 umask）
+FILE_MODE = _default_file_mode()
+
+
+class BlobStore:
+    """按 SHA-256 去重的文件存储"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.refs = self.root / "refs"
+        self.refs.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def path_for(self, digest: str, ext: str = "") -> Path:
+        return self.root / f"{digest}{ext}"
+
+    def put_bytes(self, data: bytes, ext: str = "") -> Path:
+        """写入一段内容，已存在相同内容时直接返回已有 blob"""
+        blob_path = self.path_for(self.hash_bytes(data), ext)
+        if blob_path.exists():
+            return blob_path
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.chmod(tmp_name, FILE_MODE)
+            os.replace(tmp_name, blob_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return blob_path
+
+    def put_text(self, text: str, ext: str = ".md") -> Path:
+        return self.put_bytes(text.encode("utf-8"), ext)
+
+    def put_stream(self, chunks: Iterable[bytes], ext: str = "", max_bytes: int = 0) -> Tuple[Path, int]:
+        """
+        边下载边计算哈希，写完后按哈希落盘
+
+        Args:
+            chunks: 字节块迭代器
+            ext: 文件扩展名
+            max_bytes: 大小上限，0 表示不限制；超过时抛出 ValueError
+
+        Returns:
+            (blob 路径, 字节数)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes and size > max_bytes:
+                        raise ValueError(f"内容超过 {max_bytes // 1024} KB 上限")
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            blob_path = self.path_for(digest.hexdigest(), ext)
+            if blob_path.exists():
+                os.unlink(tmp_name)
+            else:
+                os.chmod(tmp_name, FILE_MODE)
+                os.replace(tmp_name, blob_path)
+            return blob_path, size
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def get_ref(self, key: str) -> Optional[Path]:
+        """按来源（如图片 URL）查找之前保存的 blob，blob 已被删除时返回 None"""
+        try:
+            name = (self.refs / self.hash_bytes(key.encode("utf-8"))).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+
+        blob_path = self.root / name
+        return blob_path if name and blob_path.exists() else None
+
+    def set_ref(self, key: str, blob_path: Path):
+        """记录来源到 blob 的映射（文件内容为 blob 文件名）"""
+        fd, tmp_name = tempfile.mkstemp(dir=self.refs, suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(blob_path.name)
+            os.chmod(tmp_name, FILE_MODE)
+            os.replace(tmp_name, self.refs / self.hash_bytes(key.encode("utf-8")))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def link(blob_path: Path, dest: Path):
+        """在爬取目录中引用 blob：优先硬链接，不支持时退化为复制"""
+        dest.unlink(missing_ok=True)
+        try:
+            os.link(blob_path, dest)
+        except OSError:
+            shutil.copyfile(blob_path, dest)
@@ -0,0 +1,311 @@
+"""
+Playwright 浏览器池
+
+- 浏览器和上下文长期存活，按需启动，进程退出时关闭
+- Playwright 的 async API 跑在独立的事件循环线程上，爬虫工作线程通过 render() 同步调用
+- 同时打开的页面数受 PLAYWRIGHT_MAX_PAGES 限制，页面平均分摊到各上下文（一个上下文可同时打开多个页面）
+- 渲染时拦截图片、字体、媒体等资源，只取最终 DOM
+- 上下文处理 PLAYWRIGHT_CONTEXT_MAX_PAGES 个页面后重建，浏览器断开后自动重启
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Dict, List, Optional
+
+from src.config import config
+
+try:
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+    HAS_PLAYWRIGHT = True
+except ImportError:
+    HAS_PLAYWRIGHT = False
+
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+class BrowserPoolError(Exception):
+    """浏览器池异常"""
+    pass
+
+
+class _PooledContext:
+    """池中的浏览器上下文"""
+
+    __slots__ = ("browser_index", "browser", "context", "pages_served", "active", "retired")
+
+    def __init__(self, browser_index: int, browser, context):
+        self.browser_index = browser_index
+        self.browser = browser
+        self.context = context
+        self.pages_served = 0
+        self.active = 0  # 正在使用该上下文的页面数
+        self.retired = False  # 已被替换，最后一个页面关闭后关闭上下文
+
+
+class BrowserPool:
+    """长期存活的无头浏览器池"""
+
+    def __init__(
+        self,
+        browsers: Optional[int] = None,
+        contexts_per_browser: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        wait_until: Optional[str] = None,
+        wait_selector: Optional[str] = None,
+        block_resources: Optional[List[str]] = None
+    ):
+        if not HAS_PLAYWRIGHT:
+            raise BrowserPoolError("未安装 playwright (pip install playwright && playwright install chromium)")
+
+        self.browser_count = browsers or config.PLAYWRIGHT_BROWSERS
+        self.contexts_per_browser = contexts_per_browser or config.PLAYWRIGHT_CONTEXTS_PER_BROWSER
+        self.max_pages = max_pages or config.PLAYWRIGHT_MAX_PAGES
+        self.wait_until = wait_until or config.PLAYWRIGHT_WAIT_UNTIL
+        self.wait_selector = wait_selector if wait_selector is not None else config.PLAYWRIGHT_WAIT_SELECTOR
+        self.block_resources = set(
+            block_resources if block_resources is not None else config.PLAYWRIGHT_BLOCK_RESOURCES
+        )
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+        self._thread.start()
+
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._start_error: Optional[Exception] = None
+        self._closed = False
+
+        # 以下对象只在事件循环线程中访问
+        self._playwright = None
+        self._browsers: List = []
+        self._contexts: List[_PooledContext] = []
+        self._page_slots: Optional[asyncio.Semaphore] = None
+        self._checkout_lock: Optional[asyncio.Lock] = None
+        self._stats = {"pages": 0, "blocked_requests": 0, "context_recycles": 0, "browser_restarts": 0}
+
+    def render(
+        self,
+        url: str,
+        wait_until: Optional[str] = None,
+        wait_selector: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        渲染页面（线程安全，阻塞直到完成）
+
+        Args:
+            url: 目标 URL
+            wait_until: load/domcontentloaded/networkidle/commit，默认 PLAYWRIGHT_WAIT_UNTIL
+            wait_selector: 额外等待出现的 CSS 选择器
+            timeout: 超时秒数，默认 PLAYWRIGHT_TIMEOUT
+
+        Returns:
+            {"html": str, "url": str（跳转后的最终 URL）, "status": int}
+        """
+        self._ensure_started()
+        timeout = timeout or config.PLAYWRIGHT_TIMEOUT
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._render(url, wait_until or self.wait_until, wait_selector or self.wait_selector, timeout),
+            self._loop
+        )
+        # 还要算上等待空闲页面的时间
+        try:
+            return future.result(timeout * 3)
+        except concurrent.futures.TimeoutError:
+            # 取消事件循环中的渲染，释放页面名额和上下文
+            future.cancel()
+            raise
+
+    def stats(self) -> Dict:
+        return dict(self._stats)
+
+    def close(self):
+        """关闭所有上下文和浏览器，停止事件循环"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._started:
+            try:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(30)
+            except Exception as e:
+                print(f"  ⚠️  浏览器池关闭失败: {e}")
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    def _ensure_started(self):
+        if self._closed:
+            raise BrowserPoolError("浏览器池已关闭")
+        if self._started:
+            return
+        with self._start_lock:
+            # 启动失败（通常是未安装浏览器）后不再反复尝试
+            if self._start_error is not None:
+                raise BrowserPoolError(f"浏览器启动失败: {self._start_error}")
+            if not self._started:
+                try:
+                    asyncio.run_coroutine_threadsafe(self._startup(), self._loop).result(120)
+                except Exception as e:
+                    self._start_error = e
+                    raise BrowserPoolError(f"浏览器启动失败: {e}") from e
+                self._started = True
+
+    async def _startup(self):
+        self._playwright = await async_playwright().start()
+        self._page_slots = asyncio.Semaphore(self.max_pages)
+        self._checkout_lock = asyncio.Lock()
+
+        try:
+            for index in range(self.browser_count):
+                self._browsers.append(await self._launch_browser())
+                for _ in range(self.contexts_per_browser):
+                    self._contexts.append(await self._new_context(index))
+        except Exception:
+            await self._shutdown()
+            raise
+
+        print(
+            f"  🌐 浏览器池已启动: {self.browser_count} 个浏览器 × "
+            f"{self.contexts_per_browser} 个上下文，最多 {self.max_pages} 个页面并发"
+        )
+
+    async def _launch_browser(self):
+        return await self._playwright.chromium.launch(
+            headless=True,
+            args=["--disable-dev-shm-usage", "--disable-gpu"]
+        )
+
+    async def _new_context(self, browser_index: int) -> _PooledContext:
+        browser = self._browsers[browser_index]
+        context = await browser.new_context(
+            user_agent=USER_AGENT,
+            locale="zh-CN",
+            java_script_enabled=True
+        )
+        if self.block_resources:
+            await context.route("**/*", self._route)
+        return _PooledContext(browser_index, browser, context)
+
+    async def _route(self, route):
+        if route.request.resource_type in self.block_resources:
+            self._stats["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, url: str, wait_until: str, wait_selector: str, timeout: float) -> Dict:
+        async with self._page_slots:
+            pooled = await self._checkout()
+            page = None
+            try:
+                page = await pooled.context.new_page()
+                page.set_default_timeout(timeout * 1000)
+
+                try:
+                    response = await page.goto(url, wait_until=wait_until, timeout=timeout * 1000)
+                except PlaywrightTimeoutError:
+                    # 长轮询 / 统计脚本会让 networkidle 一直等不到，已加载的 DOM 仍然可用
+                    if wait_until != "networkidle" or page.url in ("", "about:blank"):
+                        raise
+                    response = None
+                if wait_selector:
+                    await page.wait_for_selector(wait_selector, timeout=timeout * 1000)
+                if config.PLAYWRIGHT_EXTRA_WAIT_MS:
+                    await page.wait_for_timeout(config.PLAYWRIGHT_EXTRA_WAIT_MS)
+
+                self._stats["pages"] += 1
+                return {
+                    "html": await page.content(),
+                    "url": page.url,
+                    "status": response.status if response else 0,
+                }
+            finally:
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass
+                await self._checkin(pooled)
+
+    async def _checkout(self) -> _PooledContext:
+        """选出正在使用的页面最少的上下文（浏览器断开时重启，上下文用满后替换）"""
+        async with self._checkout_lock:
+            index = min(range(len(self._contexts)), key=lambda i: self._contexts[i].active)
+            pooled = self._contexts[index]
+            fresh = await self._healthy(pooled)
+            if fresh is not pooled:
+                self._contexts[index] = fresh
+                pooled.retired = True
+                if pooled.active == 0:
+                    await self._close_context(pooled)
+            fresh.active += 1
+            return fresh
+
+    async def _checkin(self, pooled: _PooledContext):
+        pooled.active -= 1
+        pooled.pages_served += 1
+        if pooled.retired and pooled.active == 0:
+            await self._close_context(pooled)
+
+    async def _healthy(self, pooled: _PooledContext) -> _PooledContext:
+        """返回可用的上下文：浏览器断开时重启，上下文用满后新建（旧上下文由调用方关闭）"""
+        index = pooled.browser_index
+
+        if not self._browsers[index].is_connected():
+            self._stats["browser_restarts"] += 1
+            self._browsers[index] = await self._launch_browser()
+
+        # 浏览器重启过，旧上下文已失效
+        if pooled.browser is not self._browsers[index]:
+            return await self._new_context(index)
+
+        if pooled.pages_served >= config.PLAYWRIGHT_CONTEXT_MAX_PAGES:
+            self._stats["context_recycles"] += 1
+            return await self._new_context(index)
+
+        return pooled
+
+    @staticmethod
+    async def _close_context(pooled: _PooledContext):
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    async def _shutdown(self):
+        for pooled in self._contexts:
+            await self._close_context(pooled)
+        self._contexts = []
+
+        for browser in self._browsers:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        self._browsers = []
+
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+_browser_pool: Optional[BrowserPool] = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """获取全局浏览器池（首次渲染时才真正启动浏览器）"""
+    global _browser_pool
+    if _browser_pool is None:
+        with _browser_pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool()
+                atexit.register(_browser_pool.close)
+    return _browser_pool
@@ -0,0 +1,236 @@
+"""
+爬取缓存（TTL + HTTP 条件请求）
+
+- TTL 内直接返回上次保存的 Markdown，不发任何请求
+- TTL 过期后用 If-None-Match / If-Modified-Since 向源站发条件请求，
+  源站确认未变化（304 或校验值相同）时继续复用，不再调用付费 API
+- 只有内容可能变化时才走 Firecrawl → Jina 的爬取流程
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update
+
+from src.config import config
+from src.database import CrawlCache, DataSource, SessionLocal, upsert
+from src.crawler.url_utils import canonicalize_url
+
+
+# (状态, ETag, Last-Modified)，状态为 not_modified / modified / unknown
+Validation = Tuple[str, Optional[str], Optional[str]]
+
+
+def strip_front_matter(text: str) -> str:
+    """去掉 _save_content 写入的 YAML 头部"""
+    if text.startswith("---\n"):
+        end = text.find("\n---\n", 4)
+        if end != -1:
+            return text[end + 5:].lstrip("\n")
+    return text
+
+
+class CrawlCacheStore:
+    """按规范化 URL 缓存爬取结果"""
+
+    def __init__(self, http, ttl: Optional[int] = None):
+        self.http = http
+        self.ttl = config.CRAWL_CACHE_TTL if ttl is None else ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        return canonicalize_url(url) or url
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        查找缓存条目
+
+        Returns:
+            条目字典（含 fresh 标记），不存在或文件已丢失时返回 None
+        """
+        db = SessionLocal()
+        try:
+            entry = db.query(CrawlCache).filter(CrawlCache.url == self.cache_key(url)).first()
+            if not entry or not entry.content_path or not Path(entry.content_path).exists():
+                return None
+
+            validated_at = entry.validated_at or entry.crawled_at
+            return {
+                "content_path": entry.content_path,
+                "content_hash": entry.content_hash,
+                "images": entry.images or [],
+                "metadata": entry.page_metadata or {},
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+                "fresh": validated_at is not None
+                         and validated_at + timedelta(seconds=self.ttl) > datetime.utcnow(),
+            }
+        finally:
+            db.close()
+
+    def validate(self, url: str, entry: Dict) -> Validation:
+        """向源站发条件请求，只读取响应头"""
+        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            with self.http.stream(
+                "GET", url,
+                headers=headers,
+                raise_for_status=False,
+                timeout=config.CRAWL_VALIDATE_TIMEOUT
+            ) as response:
+                status = response.status_code
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+        except Exception:
+            return "unknown", None, None
+
+        if status == 304:
+            return "not_modified", etag or entry.get("etag"), last_modified or entry.get("last_modified")
+
+        if status >= 400:
+            return "unknown", None, None
+
+        # 部分源站忽略条件请求头，直接比较校验值
+        if (
+            (etag and etag == entry.get("etag"))
+            or (not etag and last_modified and last_modified == entry.get("last_modified"))
+        ):
+            return "not_modified", etag, last_modified
+
+        return "modified", etag, last_modified
+
+    def fetch_validators(self, url: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        用 HEAD 请求读取源站的 ETag / Last-Modified
+
+        远程策略（Firecrawl、Jina 等）拿不到源站响应头，写缓存前单独补一次；
+        源站不支持 HEAD 时改用只读响应头的 GET
+        """
+        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+        try:
+            response = self.http.request(
+                "HEAD", url,
+                headers=headers,
+                raise_for_status=False,
+                timeout=config.CRAWL_VALIDATE_TIMEOUT
+            )
+            status = response.status_code
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+
+            if status in (405, 501):
+                with self.http.stream(
+                    "GET", url,
+                    headers=headers,
+                    raise_for_status=False,
+                    timeout=config.CRAWL_VALIDATE_TIMEOUT
+                ) as response:
+                    status = response.status_code
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+        except Exception:
+            return None, None
+
+        if status >= 400:
+            return None, None
+        return etag, last_modified
+
+    def load_result(self, url: str, entry: Dict, platform: str) -> Optional[Dict]:
+        """把缓存条目还原为 URLCrawler.crawl 的返回格式"""
+        try:
+            text = Path(entry["content_path"]).read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+        content = strip_front_matter(text)
+        return {
+            "success": True,
+            "cached": True,
+            "content": content,
+            "content_path": entry["content_path"],
+            "images": entry["images"],
+            "content_hash": entry["content_hash"],
+            "metadata": {
+                "url": url,
+                "platform": platform,
+                "content_length": len(content),
+                **entry["metadata"]
+            }
+        }
+
+    def mark_validated(self, url: str, etag: Optional[str], last_modified: Optional[str]):
+        """源站确认内容未变化"""
+        now = datetime.utcnow()
+
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(CrawlCache)
+                .where(CrawlCache.url == self.cache_key(url))
+                .values(validated_at=now, etag=etag, last_modified=last_modified)
+            )
+            self._touch_data_sources(db, url, now)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"   ⚠️  爬取缓存更新失败: {e}")
+        finally:
+            db.close()
+
+    def store(
+        self,
+        url: str,
+        result: Dict,
+        platform: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """保存一次成功爬取的结果"""
+        key = self.cache_key(url)
+        now = datetime.utcnow()
+        page_metadata = {
+            k: v for k, v in result.get("metadata", {}).items()
+            if k not in ("url", "platform", "competitor", "crawl_time", "content_length")
+        }
+
+        values = {
+            "platform": platform,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": result.get("content_hash"),
+            "content_path": result.get("content_path"),
+            "images": result.get("images", []),
+            "page_metadata": page_metadata,
+            "crawled_at": now,
+            "validated_at": now,
+        }
+
+        db = SessionLocal()
+        try:
+            # 多个进程可能同时爬取同一 URL
+            upsert(db, CrawlCache, {"url": key, **values}, ["url"], list(values))
+            self._touch_data_sources(db, url, now)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"   ⚠️  爬取缓存写入失败: {e}")
+        finally:
+            db.close()
+
+    def _touch_data_sources(self, db, url: str, when: datetime):
+        """同步更新对应数据源的 last_crawl_time"""
+        urls = {url, self.cache_key(url)}
+        db.execute(
+            update(DataSource)
+            .where(DataSource.url.in_(urls))
+            .values(last_crawl_time=when)
+        )
@@ -0,0 +1,86 @@
+"""
+爬取计划（跨竞品 URL 去重）
+"""
+from typing import Dict, List, Optional
+
+from src.crawler.url_utils import canonicalize_url
+
+
+class CrawlPlan:
+    """
+    一次运行的爬取计划
+    
+    同一规范 URL 只爬取一次，结果共享给所有请求它的竞品
+    """
+    
+    def __init__(self):
+        self._urls: Dict[str, str] = {}  # 规范 URL -> 实际爬取的 URL（首次出现的写法）
+        self._requesters: Dict[str, List[str]] = {}  # 规范 URL -> 竞品名称
+        self._by_competitor: Dict[str, List[str]] = {}  # 竞品名称 -> 规范 URL（保持顺序）
+        self._results: Dict[str, Dict] = {}
+        self.requested = 0
+    
+    def add(self, url: str, competitor_name: str) -> Optional[str]:
+        """
+        登记一个爬取请求
+        
+        Returns:
+            规范 URL，无效 URL 返回 None
+        """
+        canonical = canonicalize_url(url)
+        if canonical is None:
+            return None
+        
+        self.requested += 1
+        self._urls.setdefault(canonical, url)
+        
+        requesters = self._requesters.setdefault(canonical, [])
+        if competitor_name not in requesters:
+            requesters.append(competitor_name)
+        
+        urls = self._by_competitor.setdefault(competitor_name, [])
+        if canonical not in urls:
+            urls.append(canonical)
+        
+        return canonical
+    
+    def __len__(self) -> int:
+        return len(self._urls)
+    
+    def tasks(self) -> List[Dict]:
+        """
+        去重后的爬取任务
+        
+        Returns:
+            [{"canonical_url", "url", "competitor", "requesters"}]，competitor 为首个请求者（用于保存目录）
+        """
+        return [
+            {
+                "canonical_url": canonical,
+                "url": url,
+                "competitor": self._requesters[canonical][0],
+                "requesters": list(self._requesters[canonical])
+            }
+            for canonical, url in self._urls.items()
+        ]
+    
+    def set_result(self, canonical_url: str, result: Dict):
+        self._results[canonical_url] = result
+    
+    def result(self, canonical_url: str) -> Optional[Dict]:
+        return self._results.get(canonical_url)
+    
+    def results_for(self, competitor_name: str) -> List[Dict]:
+        """某个竞品请求的全部爬取结果（共享结果附带 shared_with）"""
+        results = []
+        for canonical in self._by_competitor.get(competitor_name, []):
+            result = self._results.get(canonical)
+            if result is None:
+                continue
+            
+            requesters = self._requesters[canonical]
+            if len(requesters) > 1:
+                result = {**result, "shared_with": [name for name in requesters if name != competitor_name]}
+            results.append(result)
+        
+        return results
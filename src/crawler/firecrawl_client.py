@@ -0,0 +1,284 @@
+"""
+Firecrawl 批量抓取客户端
+
+- 整个进程共用一个 Firecrawl 客户端
+- URL 先进入待提交队列，后台线程在 FIRECRAWL_BATCH_WINDOW 秒内攒批，
+  通过批量异步接口提交（每批最多 FIRECRAWL_BATCH_SIZE 个）
+- 后台线程按 FIRECRAWL_POLL_INTERVAL 轮询任务状态，已完成的文档立即交还给等待的爬取线程
+- 预取后一直没被取走的结果保留 FIRECRAWL_RESULT_TTL 秒后丢弃
+- 兼容 v2（start_batch_scrape / get_batch_scrape_status）和
+  v1（async_batch_scrape_urls / check_batch_scrape_status）；都不支持时退化为逐个抓取
+"""
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from src.config import config
+from src.crawler.url_utils import canonicalize_url
+
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+def _field(obj: Any, *names: str, default: Any = None) -> Any:
+    """同时兼容 SDK 返回的对象和字典"""
+    for name in names:
+        value = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+        if value is not None:
+            return value
+    return default
+
+
+def _metadata_dict(metadata: Any) -> Dict:
+    if isinstance(metadata, dict):
+        return metadata
+    if hasattr(metadata, "model_dump"):
+        return metadata.model_dump(mode="json", exclude_none=True)
+    return {}
+
+
+def document_to_result(document: Any) -> Dict:
+    """把 Firecrawl 文档转换为爬取策略的返回格式，并做内容有效性检查"""
+    markdown = _field(document, "markdown", default="") or ""
+    metadata = _metadata_dict(_field(document, "metadata", default={}))
+
+    # 检查内容是否有效
+    if not markdown or len(markdown) < 100:
+        error = metadata.get("error")
+        return {"success": False, "error": error or "内容太短或为空"}
+
+    # 检查是否是验证页面
+    if "验证" in markdown[:200] or "captcha" in markdown.lower()[:200]:
+        return {"success": False, "error": "触发验证"}
+
+    return {"success": True, "content": markdown, "metadata": metadata}
+
+
+class _BatchJob:
+    """一个已提交的批量任务"""
+
+    __slots__ = ("job_id", "futures", "started_at", "next_poll_at")
+
+    def __init__(self, job_id: str, futures: Dict[str, Future]):
+        self.job_id = job_id
+        self.futures = futures  # 规范化 URL -> Future
+        self.started_at = time.monotonic()
+        self.next_poll_at = self.started_at
+
+
+class FirecrawlBatchClient:
+    """长期存活的 Firecrawl 客户端，按批提交、后台轮询"""
+
+    def __init__(self, api_key: str):
+        from firecrawl import FirecrawlApp
+
+        self.app = FirecrawlApp(api_key=api_key)
+        self.batch_size = config.FIRECRAWL_BATCH_SIZE
+        self.batch_window = config.FIRECRAWL_BATCH_WINDOW
+        self.poll_interval = config.FIRECRAWL_POLL_INTERVAL
+        self.job_timeout = config.FIRECRAWL_BATCH_TIMEOUT
+        self.result_ttl = config.FIRECRAWL_RESULT_TTL
+
+        self._start_batch = getattr(self.app, "start_batch_scrape", None) or getattr(
+            self.app, "async_batch_scrape_urls", None
+        )
+        self._batch_status = getattr(self.app, "get_batch_scrape_status", None) or getattr(
+            self.app, "check_batch_scrape_status", None
+        )
+        self._scrape_one = getattr(self.app, "scrape", None) or getattr(self.app, "scrape_url")
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: Dict[str, tuple] = {}  # 规范化 URL -> (原始 URL, Future)
+        self._pending_since: Optional[float] = None
+        self._inflight: Dict[str, Future] = {}  # 已提交或待提交的 URL，避免重复计费
+        self._done_at: Dict[str, float] = {}  # 已有结果的 URL -> 完成时间
+        self._jobs: List[_BatchJob] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def supports_batch(self) -> bool:
+        return self._start_batch is not None and self._batch_status is not None
+
+    def submit(self, url: str) -> Future:
+        """提交 URL，返回在文档就绪时完成的 Future（同一 URL 只提交一次）"""
+        key = canonicalize_url(url) or url
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None and not self._expired(key):
+                return future
+
+            future = Future()
+            future.add_done_callback(lambda done, key=key: self._mark_done(key, done))
+            self._inflight[key] = future
+            self._done_at.pop(key, None)
+            if self.supports_batch:
+                self._pending[key] = (url, future)
+                if self._pending_since is None:
+                    self._pending_since = time.monotonic()
+                self._ensure_thread()
+                self._wakeup.notify()
+
+        if not self.supports_batch:
+            self._run_single(url, future)
+        return future
+
+    def prefetch(self, urls: List[str]):
+        """提前把一批 URL 放进队列，让整个爬取计划共用少量批量任务"""
+        if self.supports_batch:
+            for url in urls:
+                self.submit(url)
+
+    def scrape(self, url: str, timeout: Optional[float] = None) -> Dict:
+        """抓取单个 URL（若已预取则直接等待预取结果）"""
+        key = canonicalize_url(url) or url
+        future = self.submit(url)
+        try:
+            return future.result(timeout or self.job_timeout + self.poll_interval * 2)
+        except Exception as e:
+            return {"success": False, "error": f"Firecrawl 等待超时或失败: {e}"}
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future and future.done():
+                    del self._inflight[key]
+                    self._done_at.pop(key, None)
+
+    def _run_single(self, url: str, future: Future):
+        try:
+            future.set_result(document_to_result(self._scrape_one(url)))
+        except Exception as e:
+            future.set_result({"success": False, "error": str(e)})
+
+    def _mark_done(self, key: str, future: Future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                self._done_at[key] = time.monotonic()
+
+    def _expired(self, key: str) -> bool:
+        """结果已超过保留时间（调用方需持有锁）"""
+        done_at = self._done_at.get(key)
+        return done_at is not None and time.monotonic() - done_at > self.result_ttl
+
+    def _evict_expired(self):
+        """丢弃预取后一直没被 scrape() 取走的结果（调用方需持有锁）"""
+        for key in [key for key in self._done_at if self._expired(key)]:
+            del self._done_at[key]
+            self._inflight.pop(key, None)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="firecrawl-batch", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """后台线程：攒批提交 + 轮询任务状态"""
+        while True:
+            with self._lock:
+                self._evict_expired()
+                while not self._pending and not self._jobs:
+                    # 空闲时也要按时清理未取走的结果
+                    self._wakeup.wait(self.result_ttl if self._done_at else None)
+                    self._evict_expired()
+
+                now = time.monotonic()
+                batch = None
+                if self._pending and (
+                    len(self._pending) >= self.batch_size
+                    or now - self._pending_since >= self.batch_window
+                ):
+                    keys = list(self._pending)[:self.batch_size]
+                    batch = {key: self._pending.pop(key) for key in keys}
+                    self._pending_since = now if self._pending else None
+
+            # 单个批次或任务出错时只让对应的 URL 失败，线程继续运行，避免其他等待方一直挂起
+            if batch:
+                try:
+                    self._submit_batch(batch)
+                except Exception as e:
+                    self._finish({key: future for key, (_, future) in batch.items()}, f"批量任务提交失败: {e}")
+
+            for job in list(self._jobs):
+                if job.next_poll_at <= time.monotonic():
+                    try:
+                        self._poll(job)
+                    except Exception as e:
+                        if job in self._jobs:
+                            self._jobs.remove(job)
+                        self._finish(job.futures, f"批量任务状态处理失败: {e}")
+
+            time.sleep(min(self.batch_window, self.poll_interval, 0.2))
+
+    def _submit_batch(self, batch: Dict[str, tuple]):
+        urls = [url for url, _ in batch.values()]
+        futures = {key: future for key, (_, future) in batch.items()}
+
+        try:
+            response = self._start_batch(urls, formats=["markdown"])
+            job_id = _field(response, "id")
+            if not job_id:
+                raise RuntimeError(_field(response, "error", default="未返回任务 ID"))
+        except Exception as e:
+            self._finish(futures, f"批量任务提交失败: {e}")
+            return
+
+        # 服务端判定无效的 URL 不会有结果
+        for invalid in _field(response, "invalid_urls", "invalidURLs", default=[]) or []:
+            key = canonicalize_url(invalid) or invalid
+            future = futures.pop(key, None)
+            if future is not None:
+                self._finish({key: future}, "URL 无效")
+
+        print(f"   🔥 Firecrawl 批量任务已提交: {len(urls)} 个 URL")
+        job = _BatchJob(job_id, futures)
+        job.next_poll_at = time.monotonic() + self.poll_interval
+        self._jobs.append(job)
+
+    def _poll(self, job: _BatchJob):
+        job.next_poll_at = time.monotonic() + self.poll_interval
+
+        try:
+            status = self._batch_status(job.job_id)
+        except Exception as e:
+            if time.monotonic() - job.started_at > self.job_timeout:
+                self._jobs.remove(job)
+                self._finish(job.futures, f"批量任务状态查询失败: {e}")
+            return
+
+        # 已完成的文档立即交还
+        for document in _field(status, "data", default=[]) or []:
+            metadata = _metadata_dict(_field(document, "metadata", default={}))
+            source_url = metadata.get("source_url") or metadata.get("sourceURL") or metadata.get("url")
+            if not source_url:
+                continue
+            key = canonicalize_url(source_url) or source_url
+            future = job.futures.pop(key, None)
+            if future is not None and not future.done():
+                future.set_result(document_to_result(document))
+
+        state = _field(status, "status", default="")
+        timed_out = time.monotonic() - job.started_at > self.job_timeout
+        if not job.futures or state in TERMINAL_STATUSES or timed_out:
+            self._jobs.remove(job)
+            reason = "批量任务超时" if timed_out and state not in TERMINAL_STATUSES else f"批量任务{state}但未返回该 URL"
+            self._finish(job.futures, reason)
+
+    def _finish(self, futures: Dict[str, Future], error: str):
+        for future in futures.values():
+            if not future.done():
+                future.set_result({"success": False, "error": error})
+
+
+_firecrawl_client: Optional[FirecrawlBatchClient] = None
+_firecrawl_client_lock = threading.Lock()
+
+
+def get_firecrawl_client(api_key: str) -> FirecrawlBatchClient:
+    """获取全局 Firecrawl 客户端"""
+    global _firecrawl_client
+    if _firecrawl_client is None:
+        with _firecrawl_client_lock:
+            if _firecrawl_client is None:
+                _firecrawl_client = FirecrawlBatchClient(api_key)
+    return _firecrawl_client
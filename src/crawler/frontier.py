@@ -0,0 +1,482 @@
+"""
+持久化爬取队列
+
+- CrawlFrontier 表记录每个 URL 的状态：pending → leased → done / failed
+- worker 用一条 UPDATE ... RETURNING 原子地领取一批 URL 并加租约，多个进程可同时领取
+- 失败按指数退避重试，超过 max_attempts 标记为 failed
+- worker 崩溃后租约到期，URL 会被其他 worker（或重启后的自己）重新领取
+- 完成的 URL 写入 RawContent（内容未变化时不重复写入），并更新 DataSource 的 status / last_crawl_time
+"""
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from src.config import config
+from src.database import Competitor, CrawlFrontier, DataSource, RawContent, SessionLocal
+from src.crawler.url_crawler import URLCrawler
+from src.crawler.url_utils import canonicalize_url
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class CrawlFrontierStore:
+    """爬取队列的读写"""
+
+    def __init__(self, lease_seconds: Optional[int] = None, max_attempts: Optional[int] = None):
+        self.lease = timedelta(seconds=lease_seconds or config.CRAWL_LEASE_SECONDS)
+        self.max_attempts = max_attempts or config.RETRY_TIMES
+
+    def enqueue(self, tasks: Iterable[Dict], requeue: bool = False) -> int:
+        """
+        加入队列（按规范化 URL 去重）
+
+        Args:
+            tasks: [{"url", "competitor_name", "source_id", "priority"}]
+            requeue: 已完成 / 已失败的 URL 是否重新排队
+
+        Returns:
+            新加入或重新排队的 URL 数
+        """
+        rows = {}
+        for task in tasks:
+            key = canonicalize_url(task["url"])
+            if key and key not in rows:
+                rows[key] = {
+                    "url": key,
+                    "raw_url": task["url"],
+                    "competitor_name": task.get("competitor_name"),
+                    "source_id": task.get("source_id"),
+                    "priority": task.get("priority", 0),
+                    "status": "pending",
+                    "attempts": 0,
+                    "max_attempts": self.max_attempts,
+                    "next_attempt_at": datetime.utcnow(),
+                }
+
+        if not rows:
+            return 0
+
+        db = SessionLocal()
+        try:
+            existing = set()
+            keys = list(rows)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                existing.update(db.scalars(select(CrawlFrontier.url).where(CrawlFrontier.url.in_(chunk))))
+
+            new_rows = [row for key, row in rows.items() if key not in existing]
+            if new_rows:
+                db.execute(insert(CrawlFrontier), new_rows)
+
+            requeued = 0
+            if requeue and existing:
+                result = db.execute(
+                    update(CrawlFrontier)
+                    .where(
+                        CrawlFrontier.url.in_(existing),
+                        CrawlFrontier.status.in_(["done", "failed"])
+                    )
+                    .values(
+                        status="pending",
+                        attempts=0,
+                        next_attempt_at=datetime.utcnow(),
+                        last_error=None,
+                        finished_at=None
+                    )
+                )
+                requeued = result.rowcount
+
+            db.commit()
+            return len(new_rows) + requeued
+        finally:
+            db.close()
+
+    def enqueue_data_sources(self, stale_hours: float = 24) -> int:
+        """把超过 stale_hours 未爬取的有效数据源加入队列"""
+        cutoff = datetime.utcnow() - timedelta(hours=stale_hours)
+
+        db = SessionLocal()
+        try:
+            sources = db.execute(
+                select(DataSource.id, DataSource.url, DataSource.priority, Competitor.name)
+                .join(Competitor, DataSource.competitor_id == Competitor.id)
+                .where(
+                    DataSource.status != "disabled",
+                    or_(DataSource.last_crawl_time.is_(None), DataSource.last_crawl_time < cutoff)
+                )
+            ).all()
+        finally:
+            db.close()
+
+        # DataSource.priority 越小越重要，队列中越大越先爬取
+        return self.enqueue(
+            (
+                {
+                    "url": row.url,
+                    "competitor_name": row.name,
+                    "source_id": row.id,
+                    "priority": -(row.priority or 0),
+                }
+                for row in sources
+            ),
+            requeue=True
+        )
+
+    def claim(self, worker_id: str, limit: int, urls: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        原子地领取最多 limit 个到期的 URL
+
+        Args:
+            urls: 只领取这些规范化 URL，None 表示不限
+        """
+        now = datetime.utcnow()
+        claimable = or_(
+            and_(CrawlFrontier.status == "pending", CrawlFrontier.next_attempt_at <= now),
+            and_(
+                CrawlFrontier.status == "leased",
+                CrawlFrontier.lease_expires_at < now,
+                CrawlFrontier.attempts < CrawlFrontier.max_attempts
+            ),
+        )
+        candidates = select(CrawlFrontier.id).where(claimable)
+        if urls is not None:
+            candidates = candidates.where(CrawlFrontier.url.in_(list(urls)))
+        candidates = (
+            candidates
+            .order_by(CrawlFrontier.priority.desc(), CrawlFrontier.id)
+            .limit(limit)
+            .scalar_subquery()
+        )
+
+        db = SessionLocal()
+        try:
+            self._reap_exhausted_leases(db, now)
+
+            # 外层再判断一次 claimable：并发领取时行被别人改过就不会重复领取
+            rows = db.execute(
+                update(CrawlFrontier)
+                .where(CrawlFrontier.id.in_(candidates), claimable)
+                .values(
+                    status="leased",
+                    lease_owner=worker_id,
+                    lease_expires_at=now + self.lease,
+                    attempts=CrawlFrontier.attempts + 1
+                )
+                .returning(
+                    CrawlFrontier.id,
+                    CrawlFrontier.url,
+                    CrawlFrontier.raw_url,
+                    CrawlFrontier.competitor_name,
+                    CrawlFrontier.source_id,
+                    CrawlFrontier.attempts,
+                    CrawlFrontier.max_attempts
+                )
+            ).all()
+            db.commit()
+        finally:
+            db.close()
+
+        return [dict(row._mapping) for row in rows]
+
+    def complete(self, item: Dict, worker_id: str, result: Dict) -> bool:
+        """
+        标记完成，写入 RawContent 并更新数据源
+
+        Returns:
+            False 表示租约已丢失（已被其他 worker 重新领取），结果被丢弃
+        """
+        now = datetime.utcnow()
+        content_hash = result.get("content_hash")
+
+        db = SessionLocal()
+        try:
+            updated = db.execute(
+                update(CrawlFrontier)
+                .where(
+                    CrawlFrontier.id == item["id"],
+                    CrawlFrontier.lease_owner == worker_id,
+                    CrawlFrontier.status == "leased"
+                )
+                .values(
+                    status="done",
+                    content_hash=content_hash,
+                    finished_at=now,
+                    last_error=None,
+                    lease_owner=None,
+                    lease_expires_at=None
+                )
+            )
+            if updated.rowcount == 0:
+                db.rollback()
+                return False
+
+            source_ids = self._source_ids(db, item)
+            if source_ids:
+                # 内容与该数据源最近一次记录相同时不重复写入
+                latest = self._latest_hashes(db, source_ids)
+                raw_rows = [
+                    {
+                        "source_id": source_id,
+                        "content_path": result.get("content_path"),
+                        "content_hash": content_hash,
+                        "crawl_time": now,
+                        "metadata": result.get("metadata", {}),
+                    }
+                    for source_id in source_ids
+                    if not content_hash or latest.get(source_id) != content_hash
+                ]
+                if raw_rows:
+                    db.execute(insert(RawContent.__table__), raw_rows)
+
+                db.execute(
+                    update(DataSource)
+                    .where(DataSource.id.in_(source_ids))
+                    .values(status="active", last_crawl_time=now)
+                )
+
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def fail(self, item: Dict, worker_id: str, error: str) -> str:
+        """
+        记录失败：未达到重试上限时退避后重新排队，否则标记为 failed
+
+        Returns:
+            新状态（pending / failed），租约已丢失时返回空字符串
+        """
+        now = datetime.utcnow()
+        exhausted = item["attempts"] >= item["max_attempts"]
+
+        values = {
+            "last_error": (error or "")[:1000],
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }
+        if exhausted:
+            values.update(status="failed", finished_at=now)
+        else:
+            values.update(status="pending", next_attempt_at=now + self._backoff(item["attempts"]))
+
+        db = SessionLocal()
+        try:
+            updated = db.execute(
+                update(CrawlFrontier)
+                .where(
+                    CrawlFrontier.id == item["id"],
+                    CrawlFrontier.lease_owner == worker_id,
+                    CrawlFrontier.status == "leased"
+                )
+                .values(**values)
+            )
+            if updated.rowcount == 0:
+                db.rollback()
+                return ""
+
+            if exhausted:
+                source_ids = self._source_ids(db, item)
+                if source_ids:
+                    db.execute(
+                        update(DataSource)
+                        .where(DataSource.id.in_(source_ids))
+                        .values(status="failed")
+                    )
+
+            db.commit()
+            return values["status"]
+        finally:
+            db.close()
+
+    def renew(self, worker_id: str) -> int:
+        """延长该 worker 持有的全部租约（心跳），返回仍持有的 URL 数"""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(CrawlFrontier)
+                .where(CrawlFrontier.lease_owner == worker_id, CrawlFrontier.status == "leased")
+                .values(lease_expires_at=datetime.utcnow() + self.lease)
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    def release(self, worker_id: str) -> int:
+        """退出时归还未完成的租约（不计入重试次数）"""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(CrawlFrontier)
+                .where(CrawlFrontier.lease_owner == worker_id, CrawlFrontier.status == "leased")
+                .values(
+                    status="pending",
+                    attempts=CrawlFrontier.attempts - 1,
+                    lease_owner=None,
+                    lease_expires_at=None
+                )
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(CrawlFrontier.status, func.count()).group_by(CrawlFrontier.status)
+            ).all()
+            return {status: count for status, count in rows}
+        finally:
+            db.close()
+
+    def _backoff(self, attempts: int) -> timedelta:
+        """指数退避 + 抖动，避免失败的 URL 同时重试"""
+        delay = min(config.CRAWL_RETRY_BACKOFF * 2 ** max(attempts - 1, 0), config.CRAWL_RETRY_BACKOFF_MAX)
+        return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+    @staticmethod
+    def _reap_exhausted_leases(db, now: datetime):
+        """租约过期且已用完重试次数的 URL（worker 多次在处理它时崩溃）直接标记失败"""
+        db.execute(
+            update(CrawlFrontier)
+            .where(
+                CrawlFrontier.status == "leased",
+                CrawlFrontier.lease_expires_at < now,
+                CrawlFrontier.attempts >= CrawlFrontier.max_attempts
+            )
+            .values(
+                status="failed",
+                finished_at=now,
+                last_error="租约多次过期",
+                lease_owner=None,
+                lease_expires_at=None
+            )
+        )
+
+    @staticmethod
+    def _source_ids(db, item: Dict) -> List[int]:
+        """入队时记录的数据源，以及 URL 相同的其他数据源"""
+        conditions = [DataSource.url.in_({item["raw_url"], item["url"]})]
+        if item.get("source_id"):
+            conditions.append(DataSource.id == item["source_id"])
+        return list(db.scalars(select(DataSource.id).where(or_(*conditions))))
+
+    @staticmethod
+    def _latest_hashes(db, source_ids: List[int]) -> Dict[int, str]:
+        latest = (
+            select(RawContent.source_id, func.max(RawContent.id).label("id"))
+            .where(RawContent.source_id.in_(source_ids))
+            .group_by(RawContent.source_id)
+            .subquery()
+        )
+        rows = db.execute(
+            select(RawContent.source_id, RawContent.content_hash)
+            .join(latest, RawContent.id == latest.c.id)
+        ).all()
+        return {source_id: content_hash for source_id, content_hash in rows}
+
+
+class CrawlWorker:
+    """从队列领取 URL 并爬取，可多进程同时运行"""
+
+    def __init__(self, crawler=None, frontier: Optional[CrawlFrontierStore] = None, worker_id: Optional[str] = None):
+        self.crawler = crawler or URLCrawler()
+        self.frontier = frontier or CrawlFrontierStore()
+        self.worker_id = worker_id or make_worker_id()
+
+    def run(
+        self,
+        batch_size: Optional[int] = None,
+        max_items: int = 0,
+        wait: float = 0,
+        urls: Optional[Iterable[str]] = None,
+        on_result: Optional[Callable[[Dict, Dict], None]] = None
+    ) -> Dict[str, int]:
+        """
+        循环领取并爬取
+
+        Args:
+            batch_size: 每次领取的 URL 数，默认 MAX_CONCURRENT_CRAWLS（领取的都能立即开始爬取）
+            max_items: 最多处理多少个 URL，0 表示不限
+            wait: 队列为空时等待多少秒再查，0 表示队列为空就退出
+            urls: 只处理这些规范化 URL，None 表示整个队列
+            on_result: 每个 URL 爬取后回调 (领取的条目, 爬取结果)
+
+        Returns:
+            本次运行的统计 {"done", "retry", "failed", "lost"}
+        """
+        batch_size = batch_size or config.MAX_CONCURRENT_CRAWLS
+        urls = None if urls is None else list(urls)
+        counts = {"done": 0, "retry": 0, "failed": 0, "lost": 0}
+        processed = 0
+
+        print(f"👷 爬取 worker 启动: {self.worker_id}")
+        try:
+            while not max_items or processed < max_items:
+                limit = min(batch_size, max_items - processed) if max_items else batch_size
+                items = self.frontier.claim(self.worker_id, limit, urls)
+
+                if not items:
+                    if wait <= 0:
+                        break
+                    time.sleep(wait)
+                    continue
+
+                # 逐级降级的爬取可能远超租约时长，爬取期间定期续约，避免被其他 worker 重复领取
+                stop = threading.Event()
+                heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), name="crawl-heartbeat", daemon=True)
+                heartbeat.start()
+                try:
+                    results = self.crawler.crawl_many(
+                        [(item["raw_url"], item["competitor_name"] or "Unknown") for item in items]
+                    )
+                finally:
+                    stop.set()
+                    heartbeat.join()
+
+                for item, result in zip(items, results):
+                    if result.get("success"):
+                        key = "done" if self.frontier.complete(item, self.worker_id, result) else "lost"
+                    else:
+                        status = self.frontier.fail(item, self.worker_id, result.get("error", "未知错误"))
+                        key = {"pending": "retry", "failed": "failed"}.get(status, "lost")
+                    counts[key] += 1
+                    if on_result:
+                        on_result(item, result)
+
+                processed += len(items)
+
+        except KeyboardInterrupt:
+            print("\n⏹️  收到中断，归还未完成的 URL")
+        finally:
+            released = self.frontier.release(self.worker_id)
+            if released:
+                print(f"   ↩️  归还 {released} 个租约")
+
+        print(
+            f"👷 worker 结束: 完成 {counts['done']}，待重试 {counts['retry']}，"
+            f"失败 {counts['failed']}，租约丢失 {counts['lost']}"
+        )
+        return counts
+
+    def _heartbeat(self, stop: threading.Event):
+        interval = max(self.frontier.lease.total_seconds() / 3, 1)
+        while not stop.wait(interval):
+            try:
+                self.frontier.renew(self.worker_id)
+            except Exception as e:
+                print(f"   ⚠️  租约续期失败: {e}")
@@ -0,0 +1,215 @@
+"""
+本地 HTML → Markdown 转换
+
+用于静态官网页面（定价、功能介绍等），不经过远程爬取 API：
+- 去掉脚本、样式、导航、页脚等噪声，优先取 <main>/<article> 正文
+- 保留标题、段落、列表、表格、链接和图片（图片链接保持绝对 URL，交给图片下载流程）
+- 计算正文长度、文本密度和链接密度，供质量检查判断是否需要降级到远程策略
+"""
+import re
+from typing import Dict, Optional, Union
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+from src.config import config
+
+
+# 不含正文的标签
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "form", "button", "input", "select", "textarea", "object", "embed",
+}
+# 站点级导航 / 页脚等模板区域
+BOILERPLATE_TAGS = ["nav", "footer", "aside"]
+BOILERPLATE_ROLES = ["navigation", "banner", "contentinfo", "complementary"]
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "header", "body", "html",
+    "figure", "figcaption", "dl", "dt", "dd", "address", "details", "summary",
+}
+# 只有 JS 才能渲染内容的页面
+JS_REQUIRED_MARKERS = ("enable javascript", "javascript is disabled", "启用 javascript", "开启 javascript")
+BLOCKED_MARKERS = ("captcha", "验证码", "安全验证", "access denied")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_HEADING_RE = re.compile(r"^h([1-6])$")
+# 行内空白文本节点留下的单个行首空格（列表缩进至少两个空格，不受影响）
+_STRAY_INDENT_RE = re.compile(r"^ (?=\S)", re.MULTILINE)
+
+
+def convert_html(html: Union[str, bytes], base_url: str, encoding: Optional[str] = None) -> Dict:
+    """
+    把 HTML 转换为 Markdown
+
+    Returns:
+        {
+            "markdown": str,
+            "title": str,
+            "description": str,
+            "text_length": int,  # 正文可见字符数
+            "text_density": float,  # 正文字符数 / 正文区域 HTML 长度
+            "link_density": float,  # 链接文字占正文的比例
+            "noscript": str,  # <noscript> 中的提示文字
+        }
+    """
+    soup = BeautifulSoup(html, "lxml", from_encoding=encoding if isinstance(html, bytes) else None)
+
+    title = _meta_content(soup, "og:title") or (soup.title.get_text(strip=True) if soup.title else "")
+    description = _meta_content(soup, "description") or _meta_content(soup, "og:description")
+    noscript = " ".join(tag.get_text(" ", strip=True) for tag in soup.find_all("noscript"))
+
+    for tag in soup.find_all(SKIP_TAGS):
+        tag.decompose()
+    for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+        comment.extract()
+
+    root = soup.find("main") or soup.find(attrs={"role": "main"}) or soup.find("article") or soup.body or soup
+    for tag in root.find_all(BOILERPLATE_TAGS):
+        tag.decompose()
+    for tag in root.find_all(attrs={"role": BOILERPLATE_ROLES}):
+        tag.decompose()
+    for tag in root.find_all(_is_hidden):
+        tag.decompose()
+
+    text = root.get_text(" ", strip=True)
+    link_text_length = sum(len(a.get_text(" ", strip=True)) for a in root.find_all("a"))
+    markup_length = len(str(root)) or 1
+
+    markdown = _render(root, base_url)
+    markdown = "\n".join(line.rstrip() for line in markdown.splitlines())
+    markdown = _STRAY_INDENT_RE.sub("", markdown)
+    markdown = _BLANK_LINES_RE.sub("\n\n", markdown).strip()
+
+    return {
+        "markdown": markdown,
+        "title": title,
+        "description": description,
+        "text_length": len(text),
+        "text_density": len(text) / markup_length,
+        "link_density": link_text_length / len(text) if text else 1.0,
+        "noscript": noscript,
+    }
+
+
+def check_quality(page: Dict) -> Optional[str]:
+    """
+    判断本地解析结果是否可用
+
+    Returns:
+        不合格的原因；合格时返回 None
+    """
+    head = page["markdown"][:500].lower()
+
+    if any(marker in head for marker in BLOCKED_MARKERS):
+        return "触发验证"
+    if page["text_length"] < config.LOCAL_MIN_CONTENT_LENGTH:
+        hints = f"{head} {page.get('noscript', '')}".lower()
+        if any(marker in hints for marker in JS_REQUIRED_MARKERS):
+            return "页面需要 JavaScript 渲染"
+        return f"正文太短 ({page['text_length']} 字符)"
+    if page["text_density"] < config.LOCAL_MIN_TEXT_DENSITY:
+        return f"文本密度过低 ({page['text_density']:.3f})"
+    if page["link_density"] > config.LOCAL_MAX_LINK_DENSITY:
+        return f"链接密度过高 ({page['link_density']:.2f})"
+    return None
+
+
+def _meta_content(soup: BeautifulSoup, name: str) -> str:
+    tag = soup.find("meta", attrs={"property": name}) or soup.find("meta", attrs={"name": name})
+    return (tag.get("content") or "").strip() if tag else ""
+
+
+def _is_hidden(tag: Tag) -> bool:
+    if tag.has_attr("hidden") or tag.get("aria-hidden") == "true":
+        return True
+    style = (tag.get("style") or "").replace(" ", "").lower()
+    return "display:none" in style or "visibility:hidden" in style
+
+
+def _render(node, base_url: str) -> str:
+    """递归渲染节点"""
+    if isinstance(node, NavigableString):
+        return _WHITESPACE_RE.sub(" ", str(node))
+    if not isinstance(node, Tag):
+        return ""
+
+    name = node.name
+
+    if name == "pre":
+        code = node.get_text().strip("\n")
+        return f"\n\n```\n{code}\n```\n\n"
+    if name == "table":
+        return _render_table(node, base_url)
+    if name in ("ul", "ol"):
+        return _render_list(node, base_url, ordered=name == "ol")
+    if name == "br":
+        return "\n"
+    if name == "hr":
+        return "\n\n---\n\n"
+    if name == "img":
+        src = node.get("src") or node.get("data-src") or node.get("data-original")
+        if not src or src.startswith("data:"):
+            return ""
+        alt = _WHITESPACE_RE.sub(" ", node.get("alt") or "").strip()
+        # 前后留空格：相邻图片连写时裸图片 URL 的正则会跨过 ")![" 匹配出错误的 URL
+        return f" ![{alt}]({urljoin(base_url, src)}) "
+
+    inner = "".join(_render(child, base_url) for child in node.children)
+
+    heading = _HEADING_RE.match(name)
+    if heading:
+        text = _WHITESPACE_RE.sub(" ", inner).strip()
+        return f"\n\n{'#' * int(heading.group(1))} {text}\n\n" if text else ""
+    if name == "a":
+        text = inner.strip()
+        href = (node.get("href") or "").strip()
+        if not text or not href or href.startswith(("#", "javascript:", "mailto:", "tel:")):
+            return inner
+        return f"[{text}]({urljoin(base_url, href)})"
+    if name in ("strong", "b"):
+        return f"**{inner.strip()}**" if inner.strip() else inner
+    if name in ("em", "i"):
+        return f"*{inner.strip()}*" if inner.strip() else inner
+    if name == "code":
+        return f"`{inner.strip()}`" if inner.strip() else ""
+    if name == "blockquote":
+        lines = inner.strip().splitlines()
+        return "\n\n" + "\n".join(f"> {line.strip()}" for line in lines) + "\n\n"
+    if name in BLOCK_TAGS or name == "li":
+        inner = inner.strip()
+        return f"\n\n{inner}\n\n" if inner else ""
+    return inner
+
+
+def _render_list(node: Tag, base_url: str, ordered: bool) -> str:
+    items = []
+    for index, li in enumerate(node.find_all("li", recursive=False), 1):
+        text = _render(li, base_url).strip()
+        if not text:
+            continue
+        lines = [line for line in text.splitlines() if line.strip()]
+        marker = f"{index}. " if ordered else "- "
+        items.append(marker + lines[0].strip())
+        items.extend(" " * len(marker) + line for line in lines[1:])
+    return "\n\n" + "\n".join(items) + "\n\n" if items else ""
+
+
+def _render_table(node: Tag, base_url: str) -> str:
+    rows = []
+    for tr in node.find_all("tr"):
+        cells = [
+            _WHITESPACE_RE.sub(" ", _render(cell, base_url)).strip().replace("|", "\\|")
+            for cell in tr.find_all(["th", "td"], recursive=False)
+        ]
+        if any(cells):
+            rows.append(cells)
+
+    if not rows:
+        return ""
+
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    lines = ["| " + " | ".join(rows[0]) + " |", "|" + " --- |" * width]
+    lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+    return "\n\n" + "\n".join(lines) + "\n\n"
@@ -0,0 +1,198 @@
+"""
+按域名自适应选择爬取策略
+
+每个 (域名, 策略) 记录成功/失败次数和耗时，持久化在 DomainTierStats 表：
+- 按平滑后的成功率（扣除少量耗时惩罚）排序，最可能成功的策略先试
+- 连续失败达到 CRAWL_TIER_SKIP_FAILURES 次的策略直接跳过，
+  每隔 CRAWL_TIER_RETRY_INTERVAL 秒放行一次试探
+- 需要登录的平台（PlatformIdentifier 识别）先验成功率较低的付费策略排在后面
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from src.config import config
+from src.database import DomainTierStats, SessionLocal, upsert
+from src.crawler.url_utils import canonicalize_url
+
+
+class _TierStats:
+    """内存中的统计条目"""
+
+    __slots__ = (
+        "platform", "needs_login", "successes", "failures", "consecutive_failures",
+        "avg_latency", "last_error", "last_success_at", "last_failure_at"
+    )
+
+    def __init__(self, platform: Optional[str] = None, needs_login: bool = False):
+        self.platform = platform
+        self.needs_login = needs_login
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.avg_latency: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[datetime] = None
+        self.last_failure_at: Optional[datetime] = None
+
+
+class TierRouter:
+    """按域名历史表现为每个 URL 安排爬取策略顺序"""
+
+    # 失败也要付费的策略
+    PAID_TIERS = {"firecrawl"}
+
+    LATENCY_WEIGHT = 0.1  # 耗时惩罚的最大值（成功率的 10%）
+    LATENCY_CAP = 60.0  # 超过 60 秒按 60 秒计
+    LATENCY_DECAY = 0.3  # 耗时指数移动平均的权重
+
+    def __init__(self, tiers: List[str]):
+        self.tiers = list(tiers)
+        self.skip_failures = config.CRAWL_TIER_SKIP_FAILURES
+        self.retry_interval = timedelta(seconds=config.CRAWL_TIER_RETRY_INTERVAL)
+        self._stats: Dict[Tuple[str, str], _TierStats] = {}
+        self._loaded_domains = set()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        return urlparse(canonicalize_url(url) or url).netloc.lower()
+
+    def plan(self, url: str, platform: Optional[str] = None, needs_login: bool = False) -> List[str]:
+        """
+        返回该 URL 应依次尝试的策略
+
+        所有策略都处于跳过期时返回空列表
+        """
+        domain = self.domain_of(url)
+        self._load_domain(domain)
+        now = datetime.utcnow()
+
+        ranked = []
+        probes = []
+        with self._lock:
+            for index, tier in enumerate(self.tiers):
+                stats = self._stats.setdefault((domain, tier), _TierStats())
+                if platform:
+                    stats.platform = platform
+                    stats.needs_login = needs_login
+
+                if self.skip_failures and stats.consecutive_failures >= self.skip_failures:
+                    if stats.last_failure_at and stats.last_failure_at + self.retry_interval > now:
+                        continue
+                    # 跳过期已过：放在最后试探一次
+                    probes.append(tier)
+                    continue
+
+                ranked.append((self._score(tier, stats), index, tier))
+
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        return [tier for _, _, tier in ranked] + probes
+
+    def record(
+        self,
+        url: str,
+        tier: str,
+        success: bool,
+        latency: float,
+        error: Optional[str] = None
+    ):
+        """记录一次爬取结果并写回数据库"""
+        domain = self.domain_of(url)
+        now = datetime.utcnow()
+
+        with self._lock:
+            stats = self._stats.setdefault((domain, tier), _TierStats())
+            if success:
+                stats.successes += 1
+                stats.consecutive_failures = 0
+                stats.last_success_at = now
+            else:
+                stats.failures += 1
+                stats.consecutive_failures += 1
+                stats.last_failure_at = now
+                stats.last_error = (error or "")[:500]
+
+            if stats.avg_latency is None:
+                stats.avg_latency = latency
+            else:
+                stats.avg_latency += self.LATENCY_DECAY * (latency - stats.avg_latency)
+
+            snapshot = {name: getattr(stats, name) for name in _TierStats.__slots__}
+
+        self._save(domain, tier, snapshot)
+
+    def success_probability(self, url: str, tier: str) -> float:
+        """该 URL 所在域名上某个策略的平滑成功率（Beta 后验均值）"""
+        domain = self.domain_of(url)
+        self._load_domain(domain)
+        with self._lock:
+            stats = self._stats.get((domain, tier)) or _TierStats()
+            return self._success_rate(tier, stats)
+
+    def _success_rate(self, tier: str, stats: _TierStats) -> float:
+        prior_success, prior_failure = 1, 1
+        if stats.needs_login and tier in self.PAID_TIERS:
+            prior_failure = 3
+
+        return (stats.successes + prior_success) / (
+            stats.successes + stats.failures + prior_success + prior_failure
+        )
+
+    def _score(self, tier: str, stats: _TierStats) -> float:
+        """平滑成功率（Beta 先验）减去耗时惩罚"""
+        latency = min(stats.avg_latency or 0.0, self.LATENCY_CAP)
+        return self._success_rate(tier, stats) - self.LATENCY_WEIGHT * latency / self.LATENCY_CAP
+
+    def _load_domain(self, domain: str):
+        """首次遇到某域名时从数据库加载历史统计（加载完成前同域名的 plan() 会等待）"""
+        with self._lock:
+            if domain in self._loaded_domains:
+                return
+
+        with self._load_lock:
+            with self._lock:
+                if domain in self._loaded_domains:
+                    return
+
+            db = SessionLocal()
+            try:
+                rows = db.query(DomainTierStats).filter(DomainTierStats.domain == domain).all()
+            except Exception as e:
+                print(f"   ⚠️  爬取策略统计加载失败: {e}")
+                rows = []
+            finally:
+                db.close()
+
+            with self._lock:
+                for row in rows:
+                    stats = _TierStats(row.platform, bool(row.needs_login))
+                    stats.successes = row.successes or 0
+                    stats.failures = row.failures or 0
+                    stats.consecutive_failures = row.consecutive_failures or 0
+                    stats.avg_latency = row.avg_latency
+                    stats.last_error = row.last_error
+                    stats.last_success_at = row.last_success_at
+                    stats.last_failure_at = row.last_failure_at
+                    self._stats[(domain, row.tier)] = stats
+                self._loaded_domains.add(domain)
+
+    def _save(self, domain: str, tier: str, snapshot: Dict):
+        # 同一域名的多个 URL 并发爬取时可能同时写入同一行；
+        # 快照写入顺序不确定，只用次数更多的快照覆盖
+        db = SessionLocal()
+        try:
+            upsert(
+                db, DomainTierStats, {"domain": domain, "tier": tier, **snapshot},
+                ["domain", "tier"], list(snapshot),
+                where=lambda excluded: (DomainTierStats.successes + DomainTierStats.failures)
+                <= (excluded.successes + excluded.failures)
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"   ⚠️  爬取策略统计写入失败: {e}")
+        finally:
+            db.close()
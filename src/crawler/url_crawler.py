@@ -1,16 +1,38 @@
 """
-URL 爬虫模块（三层策略：Firecrawl → Jina → Playwright）
+URL 爬虫模块（本地解析 → Firecrawl → Jina → Playwright，顺序按域名历史表现调整）
 """
 import os
 import re
+import json
 import hashlib
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Optional, List, Tuple
 from pathlib import Path
 from datetime import datetime
-import requests
 from urllib.parse import urlparse
 
 from src.config import config
+from src.utils.http_client import get_http_client
+from .url_utils import canonicalize_url
+from .blob_store import BlobStore
+from .crawl_cache import CrawlCacheStore, Validation
+from .tier_router import TierRouter
+from .html_to_markdown import convert_html, check_quality
+from .browser_pool import HAS_PLAYWRIGHT, get_browser_pool
+from .firecrawl_client import get_firecrawl_client
+
+
+# Markdown 图片: ![alt](url)
+MARKDOWN_IMAGE_RE = re.compile(r'!\[(.*?)\]\((https?://[^\)]+)\)', re.IGNORECASE)
+# 正文中直接出现的图片 URL
+BARE_IMAGE_URL_RE = re.compile(r'(https?://[^\s]+\.(?:jpg|jpeg|png|gif|webp))', re.IGNORECASE)
+UNSAFE_NAME_RE = re.compile(r'[^\w\s-]')
+
+# 爬取目录和 blob 目录同在 DATA_DIR 下，content.md 中的图片用相对路径引用 blob
+BLOB_DIR_NAME = "blobs"
+BLOB_LINK_PREFIX = f"../{BLOB_DIR_NAME}/"
 
 
 class PlatformIdentifier:
@@ -47,19 +69,43 @@ class PlatformIdentifier:
 
 
 class URLCrawler:
-    """URL 爬虫（三层策略）"""
+    """URL 爬虫（多层策略，按域名自适应排序）"""
+    
+    TIER_LABELS = {
+        "local": "本地解析",
+        "firecrawl": "Firecrawl",
+        "jina": "Jina Reader",
+        "playwright": "Playwright",
+    }
     
     def __init__(self):
         self.firecrawl_key = config.FIRECRAWL_API_KEY
         self.data_dir = config.DATA_DIR
+        self.http = get_http_client()
+        self.blobs = BlobStore(self.data_dir / BLOB_DIR_NAME)
+        self.cache = CrawlCacheStore(self.http)
+        
+        # 可用的爬取策略（默认顺序），实际顺序由 TierRouter 按域名历史表现决定
+        self._tiers = {}
+        if config.LOCAL_CRAWL_ENABLED:
+            self._tiers["local"] = self._crawl_locally
+        if self.firecrawl_key:
+            self._tiers["firecrawl"] = self._crawl_with_firecrawl
+        self._tiers["jina"] = self._crawl_with_jina
+        if config.PLAYWRIGHT_ENABLED and HAS_PLAYWRIGHT:
+            self._tiers["playwright"] = self._crawl_with_playwright
+        self.router = TierRouter(list(self._tiers))
+        self._host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
     
-    def crawl(self, url: str, competitor_name: str = "Unknown") -> Dict:
+    def crawl(self, url: str, competitor_name: str = "Unknown", use_cache: bool = True) -> Dict:
         """
         爬取 URL 内容
         
         Args:
             url: 目标 URL
             competitor_name: 竞品名称
+            use_cache: 是否复用爬取缓存（TTL 内直接复用，过期后用条件请求校验）
         
         Returns:
             {
@@ -76,21 +122,33 @@ class URLCrawler:
         platform, needs_login = PlatformIdentifier.identify(url)
         print(f"   平台: {platform} | 需要登录: {'是' if needs_login else '否'}")
         
-        # 策略1: Firecrawl (首选)
-        result = self._crawl_with_firecrawl(url)
-        if result["success"]:
-            print("   ✅ Firecrawl 成功")
-            return self._save_content(result, url, competitor_name, platform)
-        
-        # 策略2: Jina Reader (备选)
-        print("   🔄 降级到 Jina Reader")
-        result = self._crawl_with_jina(url)
-        if result["success"]:
-            print("   ✅ Jina Reader 成功")
-            return self._save_content(result, url, competitor_name, platform)
-        
-        # 策略3: Playwright (兜底) - 暂时跳过，需要安装浏览器
-        print("   ⚠️  Playwright 暂未实现")
+        # 爬取缓存
+        validation: Validation = ("unknown", None, None)
+        if use_cache and self.cache.enabled:
+            cached, validation = self._crawl_from_cache(url, platform)
+            if cached:
+                return cached
+        
+        # 按该域名的历史成功率安排策略顺序，跳过近期连续失败的策略
+        tiers = self.router.plan(url, platform, needs_login)
+        if len(tiers) < len(self._tiers):
+            skipped = [self.TIER_LABELS[t] for t in self._tiers if t not in tiers]
+            print(f"   ⏭️  跳过该域名近期连续失败的策略: {', '.join(skipped)}")
+        
+        for i, tier in enumerate(tiers):
+            label = self.TIER_LABELS[tier]
+            if i > 0:
+                print(f"   🔄 降级到 {label}")
+            
+            start = time.monotonic()
+            result = self._tiers[tier](url)
+            self.router.record(
+                url, tier, result["success"], time.monotonic() - start, result.get("error")
+            )
+            
+            if result["success"]:
+                print(f"   ✅ {label} 成功")
+                return self._save_and_cache(result, url, competitor_name, platform, validation)
         
         print("   ❌ 所有策略都失败")
         return {
@@ -99,38 +157,116 @@ class URLCrawler:
             "url": url
         }
     
-    def _crawl_with_firecrawl(self, url: str) -> Dict:
-        """使用 Firecrawl API 爬取"""
-        if not self.firecrawl_key:
-            return {"success": False, "error": "未配置 FIRECRAWL_API_KEY"}
+    def _crawl_from_cache(self, url: str, platform: str) -> Tuple[Optional[Dict], Validation]:
+        """
+        尝试从爬取缓存返回结果
+        
+        Returns:
+            (命中时的爬取结果, 条件请求的校验结果)，校验结果在爬取成功后写入缓存
+        """
+        entry = self.cache.lookup(url)
+        
+        if entry and entry["fresh"]:
+            result = self.cache.load_result(url, entry, platform)
+            if result:
+                print("   ♻️  命中爬取缓存")
+                return result, ("not_modified", entry["etag"], entry["last_modified"])
+        
+        # 没有缓存条目时不发校验请求，ETag / Last-Modified 取自爬取成功的策略
+        if entry is None:
+            return None, ("unknown", None, None)
+        
+        validation = self.cache.validate(url, entry)
+        status, etag, last_modified = validation
+        
+        if status == "not_modified":
+            result = self.cache.load_result(url, entry, platform)
+            if result:
+                print("   ♻️  源站内容未变化，复用缓存")
+                self.cache.mark_validated(url, etag, last_modified)
+                return result, validation
+        
+        return None, validation
+    
+    def _save_and_cache(
+        self,
+        crawl_result: Dict,
+        url: str,
+        competitor_name: str,
+        platform: str,
+        validation: Validation
+    ) -> Dict:
+        """保存内容并写入爬取缓存"""
+        result = self._save_content(crawl_result, url, competitor_name, platform)
+        _, etag, last_modified = validation
+        # 本地解析策略直接读到了源站响应头
+        if crawl_result.get("etag") or crawl_result.get("last_modified"):
+            etag, last_modified = crawl_result.get("etag"), crawl_result.get("last_modified")
+        elif not (etag or last_modified) and self.cache.enabled:
+            # 远程策略没有源站响应头，补一次 HEAD，下次才能发条件请求
+            etag, last_modified = self.cache.fetch_validators(url)
+        self.cache.store(url, result, platform, etag, last_modified)
+        return result
+    
+    def _crawl_locally(self, url: str) -> Dict:
+        """直接抓取 HTML 并在本地转换为 Markdown（适合静态页面）"""
+        headers = {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+        }
+        max_bytes = config.LOCAL_MAX_HTML_BYTES
         
         try:
-            from firecrawl import FirecrawlApp
+            with self.http.stream("GET", url, headers=headers, timeout=config.REQUEST_TIMEOUT) as response:
+                content_type = response.headers.get("content-type", "").lower()
+                etag = response.headers.get("etag")
+                last_modified = response.headers.get("last-modified")
+                if "html" not in content_type:
+                    return {"success": False, "error": f"非 HTML 内容: {content_type or '未知类型'}"}
+                
+                chunks = []
+                size = 0
+                for chunk in response.iter_bytes(65536):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        return {"success": False, "error": f"页面超过 {max_bytes // 1024} KB 上限"}
+                    chunks.append(chunk)
             
-            app = FirecrawlApp(api_key=self.firecrawl_key)
-            result = app.scrape_url(url)
-            
-            # Firecrawl v2 返回 Document 对象
-            markdown = getattr(result, 'markdown', '')
-            metadata = getattr(result, 'metadata', {})
-            
-            # 检查内容是否有效
-            if not markdown or len(markdown) < 100:
-                return {"success": False, "error": "内容太短或为空"}
+            encoding = None
+            if "charset=" in content_type:
+                encoding = content_type.split("charset=")[-1].split(";")[0].strip() or None
             
-            # 检查是否是验证页面
-            if "验证" in markdown[:200] or "captcha" in markdown.lower()[:200]:
-                return {"success": False, "error": "触发验证"}
+            page = convert_html(b"".join(chunks), url, encoding)
+            reason = check_quality(page)
+            if reason:
+                return {"success": False, "error": reason}
             
             return {
                 "success": True,
-                "content": markdown,
-                "metadata": metadata if isinstance(metadata, dict) else {}
+                "content": page["markdown"],
+                "etag": etag,
+                "last_modified": last_modified,
+                "metadata": {
+                    "title": page["title"],
+                    "description": page["description"],
+                }
             }
         
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _crawl_with_firecrawl(self, url: str) -> Dict:
+        """使用 Firecrawl API 爬取"""
+        if not self.firecrawl_key:
+            return {"success": False, "error": "未配置 FIRECRAWL_API_KEY"}
+        
+        try:
+            # 共用一个客户端，URL 通过批量接口提交；已预取的 URL 直接等待结果
+            return get_firecrawl_client(self.firecrawl_key).scrape(url)
+        
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
     def _crawl_with_jina(self, url: str) -> Dict:
         """使用 Jina Reader 爬取"""
         try:
@@ -140,12 +276,11 @@ class URLCrawler:
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
             }
             
-            response = requests.get(
+            response = self.http.get(
                 jina_url,
                 headers=headers,
                 timeout=config.REQUEST_TIMEOUT
             )
-            response.raise_for_status()
             
             content = response.text
             
@@ -162,6 +297,31 @@ class URLCrawler:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _crawl_with_playwright(self, url: str) -> Dict:
+        """使用浏览器池渲染 JS 页面后本地转换为 Markdown"""
+        try:
+            rendered = get_browser_pool().render(url)
+            
+            if rendered["status"] >= 400:
+                return {"success": False, "error": f"HTTP {rendered['status']}"}
+            
+            page = convert_html(rendered["html"], rendered["url"] or url)
+            reason = check_quality(page)
+            if reason:
+                return {"success": False, "error": reason}
+            
+            return {
+                "success": True,
+                "content": page["markdown"],
+                "metadata": {
+                    "title": page["title"],
+                    "description": page["description"],
+                }
+            }
+        
+        except Exception as e:
+            return {"success": False, "error": str(e) or type(e).__name__}
+    
     def _save_content(
         self,
         crawl_result: Dict,
@@ -173,43 +333,47 @@ class URLCrawler:
         content = crawl_result["content"]
         metadata = crawl_result.get("metadata", {})
         
-        # 生成文件名
+        # 生成文件名（同一秒内并发爬取同一竞品的多个 URL 时用 URL 哈希区分）
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_name = re.sub(r'[^\w\s-]', '_', competitor_name)[:50]
-        folder_name = f"{timestamp}_{safe_name}"
+        safe_name = UNSAFE_NAME_RE.sub('_', competitor_name)[:50]
+        url_hash = hashlib.sha1(url.encode()).hexdigest()[:8]
+        folder_name = f"{timestamp}_{safe_name}_{url_hash}"
         
         # 创建目录
         save_dir = self.data_dir / folder_name
         save_dir.mkdir(parents=True, exist_ok=True)
         
-        # 保存 Markdown
-        content_path = save_dir / "content.md"
-        
-        # 添加元数据头部
+        # 添加元数据头部（不含爬取时间，内容不变时 blob 才能复用；时间记录在 meta.json）
         header = f"""---
 title: {metadata.get('title', '未知标题')}
 url: {url}
 platform: {platform}
 competitor: {competitor_name}
-crawl_time: {datetime.now().isoformat()}
 ---
 
 """
         
-        with open(content_path, 'w', encoding='utf-8') as f:
-            f.write(header + content)
+        # 先下载图片，再把替换了图片链接的 Markdown 写入 blob 存储
+        images = self._extract_and_download_images(content, url)
+        local_content = self._replace_image_urls(content, images) if images else content
+        content_blob = self.blobs.put_text(header + local_content)
         
-        # 提取并下载图片
-        images = self._extract_and_download_images(content, save_dir, url)
+        # 爬取目录只保存指向 blob 的链接和本次爬取的元数据
+        content_path = save_dir / "content.md"
+        self.blobs.link(content_blob, content_path)
         
-        # 替换图片链接为本地路径
-        if images:
-            content_with_local_images = self._replace_image_urls(content, images)
-            with open(content_path, 'w', encoding='utf-8') as f:
-                f.write(header + content_with_local_images)
+        content_hash = hashlib.sha256(content.encode()).hexdigest()
+        crawl_time = datetime.now().isoformat()
         
-        # 计算内容哈希
-        content_hash = hashlib.md5(content.encode()).hexdigest()
+        self._write_atomic(save_dir / "meta.json", json.dumps({
+            "url": url,
+            "platform": platform,
+            "competitor": competitor_name,
+            "crawl_time": crawl_time,
+            "content_hash": content_hash,
+            "content_blob": content_blob.name,
+            "images": {img_url: path.name for img_url, path in images.items()},
+        }, ensure_ascii=False, indent=2))
         
         print(f"   💾 保存到: {content_path}")
         print(f"   🖼️  图片: {len(images)} 张")
@@ -218,13 +382,13 @@ crawl_time: {datetime.now().isoformat()}
             "success": True,
             "content": content,
             "content_path": str(content_path),
-            "images": [str(img) for img in images],
+            "images": [str(img) for img in images.values()],
             "content_hash": content_hash,
             "metadata": {
                 "url": url,
                 "platform": platform,
                 "competitor": competitor_name,
-                "crawl_time": datetime.now().isoformat(),
+                "crawl_time": crawl_time,
                 "content_length": len(content),
                 **metadata
             }
@@ -233,49 +397,68 @@ crawl_time: {datetime.now().isoformat()}
     def _extract_and_download_images(
         self,
         content: str,
-        save_dir: Path,
         base_url: str
-    ) -> List[Path]:
-        """提取并下载图片"""
-        # 提取图片 URL
-        image_patterns = [
-            r'!\[.*?\]\((https?://[^\)]+)\)',  # Markdown 格式
-            r'(https?://[^\s]+\.(?:jpg|jpeg|png|gif|webp))',  # 直接 URL
-        ]
+    ) -> Dict[str, Path]:
+        """
+        提取并下载图片到 blob 存储
         
+        Returns:
+            {图片 URL: blob 路径}，只包含下载成功的图片
+        """
+        # 提取图片 URL（Markdown 格式 + 直接 URL），去重并保持出现顺序
         image_urls = []
-        for pattern in image_patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            image_urls.extend(matches)
-        
-        # 去重
-        image_urls = list(set(image_urls))
+        spans = []
+        for match in MARKDOWN_IMAGE_RE.finditer(content):
+            image_urls.append(match.group(2))
+            spans.append(match.span())
+        # 落在 Markdown 图片语法内的裸 URL 已经统计过
+        image_urls.extend(
+            match.group(1) for match in BARE_IMAGE_URL_RE.finditer(content)
+            if not any(start < match.end() and match.start() < end for start, end in spans)
+        )
+        image_urls = list(dict.fromkeys(image_urls))
         
         if not image_urls:
-            return []
+            return {}
         
         print(f"   🖼️  发现 {len(image_urls)} 张图片")
         
-        # 下载图片
-        downloaded = []
-        for i, img_url in enumerate(image_urls[:20], 1):  # 最多下载20张
-            try:
-                img_path = self._download_image(img_url, save_dir, i, base_url)
-                if img_path:
-                    downloaded.append(img_path)
-            except Exception as e:
-                print(f"   ⚠️  图片 {i} 下载失败: {e}")
-        
-        return downloaded
+        # 并发下载图片
+        image_urls = image_urls[:config.IMAGE_MAX_COUNT]
+        paths: List[Optional[Path]] = [None] * len(image_urls)
+        
+        with ThreadPoolExecutor(
+            max_workers=min(config.IMAGE_DOWNLOAD_WORKERS, len(image_urls)),
+            thread_name_prefix="image"
+        ) as executor:
+            futures = {
+                executor.submit(self._download_image, img_url, base_url): i
+                for i, img_url in enumerate(image_urls)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    paths[i] = future.result()
+                except Exception as e:
+                    print(f"   ⚠️  图片 {i + 1} 下载失败: {e}")
+        
+        return {img_url: path for img_url, path in zip(image_urls, paths) if path}
     
     def _download_image(
         self,
         url: str,
-        save_dir: Path,
-        index: int,
         base_url: str
     ) -> Optional[Path]:
-        """下载单张图片"""
+        """
+        下载单张图片
+        
+        已下载过的 URL（包括之前的运行）直接复用；响应体分块写入 blob 存储，
+        内容相同的图片只存一份，超过 IMAGE_MAX_BYTES 的图片放弃
+        """
+        cached = self.blobs.get_ref(url)
+        if cached is not None:
+            return cached
+        
         # 设置请求头
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -286,60 +469,163 @@ crawl_time: {datetime.now().isoformat()}
         if "xiaohongshu.com" in url or "xhscdn.com" in url:
             headers["Referer"] = "https://www.xiaohongshu.com/"
         
+        max_bytes = config.IMAGE_MAX_BYTES
+        
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # 确定文件扩展名
-            content_type = response.headers.get('content-type', '')
-            ext = '.jpg'
-            if 'png' in content_type:
-                ext = '.png'
-            elif 'gif' in content_type:
-                ext = '.gif'
-            elif 'webp' in content_type:
-                ext = '.webp'
+            with self.http.stream("GET", url, headers=headers, timeout=10) as response:
+                content_length = response.headers.get("content-length")
+                if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                    print(f"   ⚠️  图片过大，跳过 ({int(content_length) // 1024} KB): {url}")
+                    return None
+                
+                # 确定文件扩展名
+                content_type = response.headers.get('content-type', '')
+                ext = '.jpg'
+                if 'png' in content_type:
+                    ext = '.png'
+                elif 'gif' in content_type:
+                    ext = '.gif'
+                elif 'webp' in content_type:
+                    ext = '.webp'
+                
+                # 分块写入
+                blob_path, _ = self.blobs.put_stream(
+                    response.iter_bytes(65536), ext=ext, max_bytes=max_bytes
+                )
             
-            # 保存
-            img_path = save_dir / f"img_{index:02d}{ext}"
-            with open(img_path, 'wb') as f:
-                f.write(response.content)
-            
-            return img_path
+            self.blobs.set_ref(url, blob_path)
+            return blob_path
         
         except Exception as e:
+            print(f"   ⚠️  图片下载失败: {url} ({e})")
             return None
     
-    def _replace_image_urls(self, content: str, local_images: List[Path]) -> str:
-        """替换图片 URL 为本地路径"""
-        # 简单实现：按顺序替换
-        # 实际应该根据 URL 匹配
-        for i, img_path in enumerate(local_images, 1):
-            content = re.sub(
-                r'!\[(.*?)\]\(https?://[^\)]+\)',
-                f'![\\1]({img_path.name})',
-                content,
-                count=1
-            )
-        return content
+    def _replace_image_urls(self, content: str, local_images: Dict[str, Path]) -> str:
+        """按 URL 把 Markdown 图片链接替换为 blob 的相对路径（单次正则替换）"""
+        def replace(match: re.Match) -> str:
+            local_path = local_images.get(match.group(2))
+            if local_path is None:
+                return match.group(0)
+            return f"![{match.group(1)}]({BLOB_LINK_PREFIX}{local_path.name})"
+        
+        return MARKDOWN_IMAGE_RE.sub(replace, content)
+    
+    @staticmethod
+    def _write_atomic(path: Path, text: str):
+        """先写临时文件再替换，避免读到写了一半的文件"""
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
     
     def batch_crawl(
         self,
         urls: List[str],
         competitor_name: str = "Unknown"
     ) -> List[Dict]:
-        """批量爬取"""
-        results = []
-        total = len(urls)
+        """批量爬取（并发，结果顺序与输入一致）"""
+        return self.crawl_many([(url, competitor_name) for url in urls])
+    
+    def crawl_many(self, tasks: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        并发爬取多个 URL
+        
+        全局并发数受 MAX_CONCURRENT_CRAWLS 限制，同一主机同时最多 MAX_CRAWLS_PER_HOST 个请求
         
-        print(f"\n📦 批量爬取 {total} 个 URL")
+        Args:
+            tasks: [(url, competitor_name)]
+        
+        Returns:
+            爬取结果列表，顺序与输入一致
+        """
+        total = len(tasks)
+        if not total:
+            return []
         
-        for i, url in enumerate(urls, 1):
-            print(f"\n[{i}/{total}]")
-            result = self.crawl(url, competitor_name)
-            results.append(result)
+        # 规范化后相同的 URL 只爬取一次，结果分发给每个输入位置
+        groups: Dict[str, List[int]] = {}
+        for i, (url, _) in enumerate(tasks):
+            groups.setdefault(canonicalize_url(url) or url, []).append(i)
+        unique = [indexes[0] for indexes in groups.values()]
+        
+        duplicates = total - len(unique)
+        print(
+            f"\n📦 批量爬取 {len(unique)} 个 URL (并发 {min(config.MAX_CONCURRENT_CRAWLS, len(unique))})"
+            + (f"，跳过 {duplicates} 个重复 URL" if duplicates else "")
+        )
+        
+        self._prefetch_firecrawl([tasks[i][0] for i in unique])
+        
+        results: List[Optional[Dict]] = [None] * total
+        with ThreadPoolExecutor(
+            max_workers=min(config.MAX_CONCURRENT_CRAWLS, len(unique)),
+            thread_name_prefix="crawl"
+        ) as executor:
+            futures = {
+                executor.submit(self._crawl_politely, *tasks[i]): indexes
+                for i, indexes in zip(unique, groups.values())
+            }
+            
+            for future in as_completed(futures):
+                indexes = futures[future]
+                url = tasks[indexes[0]][0]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"   ❌ 爬取异常 {url}: {e}")
+                    result = {"success": False, "error": str(e), "url": url}
+                for i in indexes:
+                    results[i] = result
         
         success_count = sum(1 for r in results if r.get("success"))
         print(f"\n✅ 完成: {success_count}/{total} 成功")
         
         return results
+    
+    def _prefetch_firecrawl(self, urls: List[str]):
+        """
+        把很可能要用到 Firecrawl 的 URL 一次性提交为批量任务
+        
+        计划中排在 Firecrawl 之前的策略都失败的概率（按各策略的平滑成功率估计）
+        不低于 FIRECRAWL_PREFETCH_MIN_REACH 时预取。
+        有缓存条目的 URL 可能不需要重新爬取，不预取，避免白付费用
+        """
+        if "firecrawl" not in self._tiers:
+            return
+        
+        prefetch = []
+        for url in dict.fromkeys(urls):
+            if self.cache.enabled and self.cache.lookup(url):
+                continue
+            platform, needs_login = PlatformIdentifier.identify(url)
+            tiers = self.router.plan(url, platform, needs_login)
+            if "firecrawl" not in tiers:
+                continue
+            
+            reach = 1.0
+            for tier in tiers[:tiers.index("firecrawl")]:
+                reach *= 1 - self.router.success_probability(url, tier)
+            if reach >= config.FIRECRAWL_PREFETCH_MIN_REACH:
+                prefetch.append(url)
+        
+        if not prefetch:
+            return
+        
+        try:
+            get_firecrawl_client(self.firecrawl_key).prefetch(prefetch)
+        except Exception as e:
+            print(f"   ⚠️  Firecrawl 预取失败: {e}")
+    
+    def _crawl_politely(self, url: str, competitor_name: str) -> Dict:
+        """在主机级并发限制内爬取"""
+        with self._host_semaphore(url):
+            return self.crawl(url, competitor_name)
+    
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc.lower()
+        with self._host_lock:
+            semaphore = self._host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(config.MAX_CRAWLS_PER_HOST)
+                self._host_semaphores[host] = semaphore
+            return semaphore
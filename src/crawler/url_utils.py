@@ -0,0 +1,71 @@
+"""
+URL 规范化
+"""
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = {
+    "gclid", "fbclid", "msclkid", "yclid", "dclid", "igshid",
+    "spm", "scm", "from", "ref", "ref_src", "share_from", "share_source",
+    "xsec_source", "xsec_token", "app_platform", "app_version", "share_id",
+    "_hsenc", "_hsmi", "mc_cid", "mc_eid", "vd_source", "utm_id",
+}
+TRACKING_PREFIXES = ("utm_", "hmsr", "hmpl", "hmcu", "hmkw", "hmci")
+
+# 移动端 / 默认子域名，与主站内容相同
+ALIAS_SUBDOMAINS = ("www.", "m.", "mobile.", "wap.", "h5.")
+
+_MULTI_SLASH_RE = re.compile(r"/{2,}")
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """
+    生成 URL 的规范形式（只用于判重，实际爬取仍使用原始 URL）
+    
+    - 统一为 https，主机名小写，去掉默认端口和 www/m 等子域名
+    - 去掉跟踪参数和 fragment，其余参数按名称排序
+    - 合并重复斜杠，去掉路径末尾的斜杠
+    
+    Returns:
+        规范化后的 URL，无法解析时返回 None
+    """
+    if not url:
+        return None
+    
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    
+    parsed = urlparse(url)
+    if parsed.scheme.lower() not in ("http", "https") or not parsed.hostname:
+        return None
+    
+    host = parsed.hostname.lower().rstrip(".")
+    for prefix in ALIAS_SUBDOMAINS:
+        if host.startswith(prefix) and host.count(".") >= 2:
+            host = host[len(prefix):]
+            break
+    
+    port = parsed.port
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    
+    path = _MULTI_SLASH_RE.sub("/", parsed.path or "/")
+    if len(path) > 1:
+        path = path.rstrip("/")
+    
+    params = [
+        (name, value)
+        for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    ]
+    query = urlencode(sorted(params))
+    
+    return urlunparse(("https", netloc, path, "", query, ""))
@@ -6,8 +6,12 @@ from .models import (
     DiscoveryTask,
     SearchCache,
     Competitor,
+    CompetitorAlias,
     DataSource,
     RawContent,
+    CrawlCache,
+    DomainTierStats,
+    CrawlFrontier,
     ParsedData,
     AnalysisReport,
     ChangeLog,
@@ -15,18 +19,24 @@ from .models import (
     get_db,
     SessionLocal
 )
+from .upsert import upsert
 
 __all__ = [
     "Base",
     "DiscoveryTask",
     "SearchCache",
     "Competitor",
+    "CompetitorAlias",
     "DataSource",
     "RawContent",
+    "CrawlCache",
+    "DomainTierStats",
+    "CrawlFrontier",
     "ParsedData",
     "AnalysisReport",
     "ChangeLog",
     "init_db",
     "get_db",
-    "SessionLocal"
+    "SessionLocal",
+    "upsert"
 ]
@@ -3,7 +3,7 @@
 """
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import create_engine, Column, Integer, String, Text, Float, Boolean, DateTime, JSON, ForeignKey
+from sqlalchemy import create_engine, inspect, Column, Integer, String, Text, Float, Boolean, DateTime, JSON, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 
@@ -37,7 +37,11 @@ class SearchCache(Base):
     __tablename__ = "search_cache"
     
     id = Column(Integer, primary_key=True)
-    query = Column(String(500), unique=True, nullable=False, index=True)
+    cache_key = Column(String(600), unique=True, nullable=False, index=True)  # 规范化查询 + 地区/语言
+    query = Column(String(500), nullable=False)  # 原始查询
+    gl = Column(String(20))
+    hl = Column(String(20))
+    num_results = Column(Integer)  # 请求时的结果数量，小于等于它的请求都可直接复用
     search_engine = Column(String(50))
     results = Column(JSON)
     cached_at = Column(DateTime, default=datetime.utcnow)
@@ -63,6 +67,20 @@ class Competitor(Base):
     discovery_task = relationship("DiscoveryTask", back_populates="competitors")
     data_sources = relationship("DataSource", back_populates="competitor")
     change_logs = relationship("ChangeLog", back_populates="competitor")
+    aliases = relationship("CompetitorAlias", back_populates="competitor")
+
+
+class CompetitorAlias(Base):
+    """竞品别名索引表（跨发现任务识别同一竞品）"""
+    __tablename__ = "competitor_aliases"
+    
+    id = Column(Integer, primary_key=True)
+    alias = Column(String(200), nullable=False)  # 原始写法
+    alias_key = Column(String(200), unique=True, nullable=False, index=True)  # 规范化键
+    competitor_id = Column(Integer, ForeignKey("competitors.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    competitor = relationship("Competitor", back_populates="aliases")
 
 
 class DataSource(Base):
@@ -98,6 +116,64 @@ class RawContent(Base):
     parsed_data = relationship("ParsedData", back_populates="raw_content")
 
 
+class CrawlCache(Base):
+    """爬取缓存表（按规范化 URL 记录最近一次爬取结果和 HTTP 校验信息）"""
+    __tablename__ = "crawl_cache"
+    
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1000), unique=True, nullable=False, index=True)  # 规范化 URL
+    platform = Column(String(50))
+    etag = Column(String(500))  # 源站 ETag
+    last_modified = Column(String(100))  # 源站 Last-Modified
+    content_hash = Column(String(64))
+    content_path = Column(Text)
+    images = Column(JSON)
+    page_metadata = Column(JSON)
+    crawled_at = Column(DateTime)  # 最近一次真正爬取的时间
+    validated_at = Column(DateTime)  # 最近一次确认内容未变化的时间
+
+
+class DomainTierStats(Base):
+    """各域名在各爬取策略上的成功率和耗时统计"""
+    __tablename__ = "domain_tier_stats"
+    __table_args__ = (UniqueConstraint("domain", "tier"),)
+    
+    id = Column(Integer, primary_key=True)
+    domain = Column(String(255), nullable=False, index=True)
+    tier = Column(String(30), nullable=False)  # firecrawl/jina 等
+    platform = Column(String(50))  # PlatformIdentifier 识别的平台
+    needs_login = Column(Boolean, default=False)
+    successes = Column(Integer, default=0)
+    failures = Column(Integer, default=0)
+    consecutive_failures = Column(Integer, default=0)
+    avg_latency = Column(Float)  # 秒，指数移动平均
+    last_error = Column(Text)
+    last_success_at = Column(DateTime)
+    last_failure_at = Column(DateTime)
+
+
+class CrawlFrontier(Base):
+    """持久化爬取队列（多个 worker 进程通过租约领取）"""
+    __tablename__ = "crawl_frontier"
+    
+    id = Column(Integer, primary_key=True)
+    url = Column(String(1000), unique=True, nullable=False, index=True)  # 规范化 URL
+    raw_url = Column(Text, nullable=False)  # 实际请求的 URL
+    competitor_name = Column(String(200))
+    source_id = Column(Integer, ForeignKey("data_sources.id"))
+    priority = Column(Integer, default=0)  # 越大越先爬取
+    status = Column(String(20), default="pending", index=True)  # pending/leased/done/failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)  # 重试退避
+    lease_owner = Column(String(100))
+    lease_expires_at = Column(DateTime, index=True)
+    last_error = Column(Text)
+    content_hash = Column(String(64))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+
 class ParsedData(Base):
     """解析结果表"""
     __tablename__ = "parsed_data"
@@ -146,8 +222,21 @@ engine = create_engine(config.DATABASE_URL, echo=False)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
 
+def _drop_legacy_search_cache():
+    """旧版 search_cache 表没有 cache_key 列，只存缓存数据，直接删除后重建"""
+    inspector = inspect(engine)
+    if not inspector.has_table(SearchCache.__tablename__):
+        return
+    
+    columns = {column["name"] for column in inspector.get_columns(SearchCache.__tablename__)}
+    if "cache_key" not in columns:
+        SearchCache.__table__.drop(bind=engine)
+        print("  ♻️  旧版搜索缓存表已删除并重建")
+
+
 def init_db():
     """初始化数据库"""
+    _drop_legacy_search_cache()
     Base.metadata.create_all(bind=engine)
     print("✅ 数据库初始化完成")
 
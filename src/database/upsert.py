@@ -0,0 +1,73 @@
+"""
+按数据库方言选择的 INSERT ... ON CONFLICT
+"""
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import and_, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+
+_ON_CONFLICT_INSERTS = {
+    "sqlite": sqlite_insert,
+    "postgresql": postgresql_insert,
+}
+
+
+def upsert(
+    db,
+    model,
+    rows: Union[Dict, List[Dict]],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+    where: Optional[Callable] = None
+):
+    """
+    插入一行或多行，唯一键冲突时更新或跳过（在调用方的事务中执行，不提交）
+
+    Args:
+        db: 会话
+        model: ORM 模型
+        rows: 行数据（按列名）
+        index_elements: 唯一约束的列名
+        update_columns: 冲突时用新值覆盖的列，None 表示冲突时跳过
+        where: 冲突时是否更新的条件，接收新值命名空间 excluded（按列名取值），
+            返回 SQL 表达式，例如 lambda excluded: Model.count <= excluded.count
+    """
+    rows = [rows] if isinstance(rows, dict) else list(rows)
+    if not rows:
+        return
+
+    table = model.__table__
+    on_conflict_insert = _ON_CONFLICT_INSERTS.get(db.bind.dialect.name)
+
+    if on_conflict_insert is not None:
+        statement = on_conflict_insert(table)
+        if update_columns:
+            statement = statement.on_conflict_do_update(
+                index_elements=list(index_elements),
+                set_={name: statement.excluded[name] for name in update_columns},
+                where=where(statement.excluded) if where else None
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=list(index_elements))
+        db.execute(statement, rows)
+        return
+
+    # 其他数据库：事务内先更新、再插入（并发写入同一键时仍可能冲突，由调用方处理）
+    for row in rows:
+        matches = and_(*(table.c[name] == row[name] for name in index_elements))
+
+        if update_columns:
+            statement = update(table).where(matches).values({name: row[name] for name in update_columns})
+            if where:
+                excluded = SimpleNamespace(**{
+                    name: literal(value, type_=table.c[name].type) for name, value in row.items()
+                })
+                statement = statement.where(where(excluded))
+            if db.execute(statement).rowcount:
+                continue
+
+        if db.execute(select(table.c[index_elements[0]]).where(matches)).first() is None:
+            db.execute(insert(table).values(row))
@@ -0,0 +1,139 @@
+"""
+竞品别名索引（持久化，跨发现任务复用）
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+
+from src.database import Competitor, CompetitorAlias, DataSource, SessionLocal, upsert
+from src.discovery.dedup import best_match, compact_name, normalize_name
+
+
+class CompetitorAliasIndex:
+    """
+    竞品规范名称 / 别名索引
+    
+    匹配顺序：规范化键精确匹配（字典查找）→ 模糊匹配兜底。
+    历史上没有别名记录的竞品以其名称参与匹配
+    """
+    
+    def __init__(self, threshold: float = 85):
+        self.threshold = threshold
+        self._by_key: Dict[str, int] = {}
+        self._fuzzy_names: List[str] = []
+        self._fuzzy_ids: List[int] = []
+        self._loaded = False
+    
+    def load(self):
+        """从数据库加载索引"""
+        db = SessionLocal()
+        try:
+            by_key: Dict[str, int] = {}
+            
+            # 先加载竞品名称（按 ID 升序，最早的记录作为规范竞品）
+            for competitor_id, name in db.query(Competitor.id, Competitor.name).order_by(Competitor.id):
+                by_key.setdefault(compact_name(name), competitor_id)
+            
+            # 别名表优先级更高
+            for alias_key, competitor_id in db.query(CompetitorAlias.alias_key, CompetitorAlias.competitor_id):
+                by_key[alias_key] = competitor_id
+        finally:
+            db.close()
+        
+        self._by_key = {key: cid for key, cid in by_key.items() if key}
+        self._fuzzy_names = list(self._by_key.keys())
+        self._fuzzy_ids = [self._by_key[key] for key in self._fuzzy_names]
+        self._loaded = True
+    
+    def match(self, names: Iterable[str]) -> Optional[int]:
+        """
+        查找已知竞品
+        
+        Args:
+            names: 候选名称及其别名
+        
+        Returns:
+            已知竞品 ID，未找到返回 None
+        """
+        if not self._loaded:
+            self.load()
+        
+        names = [name for name in names if name]
+        
+        for name in names:
+            competitor_id = self._by_key.get(compact_name(name))
+            if competitor_id is not None:
+                return competitor_id
+        
+        for name in names:
+            index = best_match(compact_name(name), self._fuzzy_names, self.threshold)
+            if index is not None:
+                return self._fuzzy_ids[index]
+        
+        return None
+    
+    def register(self, competitor_id: int, names: Iterable[str]) -> List[Dict]:
+        """
+        登记别名（已存在的键跳过）
+        
+        Returns:
+            需要插入 competitor_aliases 表的行，由调用方在自己的事务中通过 save() 写入
+        """
+        rows = []
+        for name in names:
+            key = compact_name(name)
+            if not key or key in self._by_key:
+                continue
+            
+            rows.append({
+                "alias": normalize_name(name),
+                "alias_key": key,
+                "competitor_id": competitor_id
+            })
+            self._by_key[key] = competitor_id
+            self._fuzzy_names.append(key)
+            self._fuzzy_ids.append(competitor_id)
+        
+        return rows
+    
+    def save(self, db, rows: List[Dict]):
+        """
+        在调用方的事务中写入 register() 返回的别名行
+        
+        并发的发现任务可能已登记了同一个键：冲突的行跳过，再按数据库中的记录校正索引
+        """
+        upsert(db, CompetitorAlias, rows, ["alias_key"])
+        
+        keys = [row["alias_key"] for row in rows]
+        stored = db.execute(
+            select(CompetitorAlias.alias_key, CompetitorAlias.competitor_id)
+            .where(CompetitorAlias.alias_key.in_(keys))
+        ).all()
+        for alias_key, competitor_id in stored:
+            self._by_key[alias_key] = competitor_id
+        self._fuzzy_names = list(self._by_key.keys())
+        self._fuzzy_ids = [self._by_key[key] for key in self._fuzzy_names]
+    
+    @staticmethod
+    def load_sources(competitor_id: int) -> List[Dict]:
+        """读取已知竞品的数据源（与发现阶段的数据源格式一致）"""
+        db = SessionLocal()
+        try:
+            rows = db.query(DataSource).filter(
+                DataSource.competitor_id == competitor_id,
+                DataSource.status == "active"
+            ).order_by(DataSource.priority, DataSource.id).all()
+            
+            return [
+                {
+                    "type": row.source_type,
+                    "url": row.url,
+                    "title": "",
+                    "priority": row.priority,
+                    "quality_score": row.quality_score,
+                    "source_id": row.id
+                }
+                for row in rows
+            ]
+        finally:
+            db.close()
@@ -0,0 +1,160 @@
+"""
+搜索缓存维护（过期清理 / 统计 / 预热 / 压缩）
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, select
+
+from src.database import SearchCache, SessionLocal
+from src.discovery.search_cache import search_cache
+
+
+def purge_expired(chunk_size: int = 500) -> int:
+    """
+    分批删除过期缓存，避免长事务锁表
+    
+    Returns:
+        删除的行数
+    """
+    deleted = 0
+    now = datetime.utcnow()
+    
+    while True:
+        db = SessionLocal()
+        try:
+            ids = db.execute(
+                select(SearchCache.id)
+                .where(SearchCache.expires_at <= now)
+                .limit(chunk_size)
+            ).scalars().all()
+            
+            if not ids:
+                break
+            
+            db.execute(delete(SearchCache).where(SearchCache.id.in_(ids)))
+            db.commit()
+            deleted += len(ids)
+        finally:
+            db.close()
+    
+    return deleted
+
+
+def cache_stats() -> Dict:
+    """
+    缓存统计
+    
+    每条缓存记录对应一次真实 API 请求（未命中），命中率 = 命中次数 / (命中次数 + 记录数)
+    """
+    now = datetime.utcnow()
+    
+    db = SessionLocal()
+    try:
+        total = db.query(func.count(SearchCache.id)).scalar() or 0
+        expired = db.query(func.count(SearchCache.id)).filter(SearchCache.expires_at <= now).scalar() or 0
+        hits = db.query(func.coalesce(func.sum(SearchCache.hit_count), 0)).scalar() or 0
+        by_engine = dict(
+            db.query(SearchCache.search_engine, func.count(SearchCache.id))
+            .group_by(SearchCache.search_engine)
+            .all()
+        )
+    finally:
+        db.close()
+    
+    return {
+        "total": total,
+        "active": total - expired,
+        "expired": expired,
+        "hits": hits,
+        "hit_rate": hits / (hits + total) if hits + total else 0.0,
+        "by_engine": by_engine
+    }
+
+
+def prewarm(top_n: int = 20, window_hours: int = 24, preferred_engine: Optional[str] = None) -> int:
+    """
+    预热即将过期的热门查询：按命中次数取前 N 条，在过期前重新请求并刷新缓存
+    
+    Returns:
+        成功刷新的查询数
+    """
+    from src.discovery.search_engine import MultiEngineSearch
+    
+    now = datetime.utcnow()
+    
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            SearchCache.query,
+            SearchCache.num_results,
+            SearchCache.gl,
+            SearchCache.hl
+        ).filter(
+            SearchCache.expires_at > now,
+            SearchCache.expires_at <= now + timedelta(hours=window_hours),
+            SearchCache.hit_count > 0
+        ).order_by(SearchCache.hit_count.desc()).limit(top_n).all()
+    finally:
+        db.close()
+    
+    if not rows:
+        return 0
+    
+    searcher = MultiEngineSearch(preferred_engine=preferred_engine) if preferred_engine else MultiEngineSearch()
+    refreshed = 0
+    for query, num_results, gl, hl in rows:
+        print(f"  🔥 预热: {query}")
+        if searcher.refresh(query, num_results or 10, gl, hl):
+            refreshed += 1
+    
+    return refreshed
+
+
+def compact() -> bool:
+    """压缩数据库文件（仅 SQLite，删除大量行后回收磁盘空间）"""
+    db = SessionLocal()
+    try:
+        bind = db.get_bind()
+    finally:
+        db.close()
+    
+    if bind.dialect.name != "sqlite":
+        return False
+    
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("VACUUM")
+    return True
+
+
+def run_cache_maintenance(
+    chunk_size: int = 500,
+    prewarm_top: int = 0,
+    prewarm_window_hours: int = 24,
+    vacuum: bool = False
+) -> Dict:
+    """执行一次完整的缓存维护（适合定时调用）"""
+    # 先把进程内累计的命中次数写回，统计才准确
+    search_cache.flush_hits()
+    
+    print("🧹 清理过期搜索缓存...")
+    deleted = purge_expired(chunk_size)
+    print(f"   删除 {deleted} 条过期记录")
+    
+    refreshed = 0
+    if prewarm_top > 0:
+        print(f"🔥 预热 {prewarm_window_hours} 小时内过期的热门查询 (最多 {prewarm_top} 条)...")
+        refreshed = prewarm(prewarm_top, prewarm_window_hours)
+        print(f"   刷新 {refreshed} 条")
+    
+    if vacuum and compact():
+        print("🗜️  数据库已压缩")
+    
+    stats = cache_stats()
+    print("📊 缓存统计:")
+    print(f"   记录数: {stats['total']} (有效 {stats['active']} | 过期 {stats['expired']})")
+    print(f"   命中次数: {stats['hits']} | 命中率: {stats['hit_rate']*100:.1f}%")
+    for engine, count in stats["by_engine"].items():
+        print(f"   {engine or '未知'}: {count} 条")
+    
+    return {"deleted": deleted, "refreshed": refreshed, **stats}
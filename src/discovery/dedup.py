@@ -0,0 +1,267 @@
+"""
+竞品名称去重引擎（分块 + 批量相似度 + 并查集）
+
+- 分块：按名称字符 bigram 做前缀过滤，只有共享稀有 bigram 的名称才会互相比较；
+  需要共享的 bigram 数由相似度阈值推出，不会漏掉超过阈值的名称对
+- 打分：块内使用 rapidfuzz.process.cdist 批量计算相似度矩阵（未安装时退回 fuzzywuzzy 逐对比较）
+- 聚类：相似度超过阈值的名称用并查集合并，结果与输入顺序无关
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import numpy  # noqa: F401  rapidfuzz.process.cdist 返回 numpy 矩阵
+    from rapidfuzz import fuzz as _rf_fuzz
+    from rapidfuzz import process as _rf_process
+    HAS_RAPIDFUZZ = True
+except ImportError:
+    from fuzzywuzzy import fuzz as _fw_fuzz
+    HAS_RAPIDFUZZ = False
+
+
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_name(name: str) -> str:
+    """规范化名称（用于相似度计算）"""
+    return unicodedata.normalize("NFKC", name).lower().strip()
+
+
+def compact_name(name: str) -> str:
+    """去掉空白和标点的规范化名称（用于分块和精确匹配）"""
+    return _NON_WORD_RE.sub("", normalize_name(name))
+
+
+def name_grams(name: str) -> Set[Tuple[str, int]]:
+    """
+    规范化名称的字符 bigram，重复的 bigram 按出现次序编号
+
+    两个名称的集合交集大小等于 bigram 多重集的交集大小
+    """
+    name = normalize_name(name)
+    seen: Dict[str, int] = defaultdict(int)
+    grams = set()
+    for i in range(len(name) - 1):
+        gram = name[i:i + 2]
+        grams.add((gram, seen[gram]))
+        seen[gram] += 1
+    return grams
+
+
+@lru_cache(maxsize=None)
+def required_overlap(length: int, threshold: float) -> int:
+    """
+    长度为 length 的名称与任意名称 fuzz.ratio 超过 threshold 时，至少共享的 bigram 数
+
+    ratio = 200 * LCS / (la + lb)，超过阈值要求 LCS >= floor(threshold * (la + lb) / 200) + 1；
+    LCS 对齐中相邻两个字符只有在两边都连续时才构成共同 bigram，
+    两边的间隔数分别不超过 la - LCS、lb - LCS，因此共同 bigram 至少 3 * LCS - 1 - la - lb。
+    返回所有可能的对方长度下的最小值，0 表示无法过滤、需要与所有名称比较
+    """
+    best = None
+    for other in range(1, length * 3 + 2):
+        # 长度差太大时相似度不可能超过阈值
+        if 200 * min(length, other) <= threshold * (length + other):
+            if other > length:
+                break
+            continue
+        lcs = int(threshold * (length + other) // 200) + 1
+        overlap = max(0, 3 * lcs - 1 - length - other)
+        best = overlap if best is None else min(best, overlap)
+    return best or 0
+
+
+class _UnionFind:
+    """并查集"""
+    
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+    
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+    
+    def union(self, a: int, b: int):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # 总是挂到较小的下标上，保证结果确定
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+class CompetitorDeduplicator:
+    """竞品名称去重引擎"""
+    
+    def __init__(self, threshold: float = 85):
+        """
+        Args:
+            threshold: 相似度阈值（0-100，大于该值视为同一竞品）
+        """
+        self.threshold = threshold
+    
+    def deduplicate(self, competitors: List[Dict]) -> List[Dict]:
+        """
+        去重和合并竞品
+        
+        每个簇保留置信度最高的名称（相同时取更短、字典序更小的），
+        置信度取簇内最大值，其余名称记入 aliases
+        """
+        if not competitors:
+            return []
+        
+        names = [normalize_name(comp["name"]) for comp in competitors]
+        
+        # 先按规范化名称精确合并，减少需要模糊比较的数量
+        unique_names = sorted(set(names))
+        index_of = {name: i for i, name in enumerate(unique_names)}
+        
+        uf = _UnionFind(len(unique_names))
+        for a, b in self._similar_pairs(unique_names):
+            uf.union(a, b)
+        
+        clusters: Dict[int, List[Dict]] = defaultdict(list)
+        for comp, name in zip(competitors, names):
+            clusters[uf.find(index_of[name])].append(comp)
+        
+        unique = [self._merge_cluster(members) for members in clusters.values()]
+        unique.sort(key=lambda c: (-c.get("confidence", 0), normalize_name(c["name"])))
+        return unique
+    
+    def _merge_cluster(self, members: List[Dict]) -> Dict:
+        best = min(
+            members,
+            key=lambda c: (-c.get("confidence", 0), len(c["name"]), normalize_name(c["name"]))
+        )
+        merged = dict(best)
+        merged["confidence"] = max(c.get("confidence", 0) for c in members)
+        
+        # 成员名称及其各自已有的别名都并入
+        best_key = normalize_name(best["name"])
+        aliases = sorted({
+            name
+            for c in members
+            for name in [c["name"], *c.get("aliases", [])]
+            if normalize_name(name) != best_key
+        })
+        if aliases:
+            merged["aliases"] = aliases
+        
+        return merged
+    
+    def _blocks(self, names: List[str]) -> Tuple[List[List[int]], List[int]]:
+        """
+        前缀过滤分块
+
+        把每个名称的 bigram 按全局频率从低到高排序，只取前 len - k + 1 个作为分块键，
+        k 为 required_overlap 给出的最少共享 bigram 数：相似度超过阈值的两个名称
+        至少共享 k 个 bigram，必然共享至少一个分块键
+
+        Returns:
+            (块列表, 无法过滤的名称下标)，后者需要与所有名称比较（通常是极短的名称）
+        """
+        grams = [name_grams(name) for name in names]
+        frequency: Dict[Tuple[str, int], int] = defaultdict(int)
+        for gram_set in grams:
+            for gram in gram_set:
+                frequency[gram] += 1
+
+        blocks: Dict[Tuple[str, int], List[int]] = defaultdict(list)
+        unfiltered = []
+        for i, gram_set in enumerate(grams):
+            overlap = required_overlap(len(names[i]), self.threshold)
+            if overlap == 0 or len(gram_set) < overlap:
+                unfiltered.append(i)
+                continue
+
+            ordered = sorted(gram_set, key=lambda g: (frequency[g], g))
+            for gram in ordered[:len(ordered) - overlap + 1]:
+                blocks[gram].append(i)
+
+        return [members for members in blocks.values() if len(members) > 1], unfiltered
+
+    def _similar_pairs(self, names: List[str]) -> Set[Tuple[int, int]]:
+        """返回相似度超过阈值的名称下标对"""
+        pairs = set()
+        seen_blocks = set()
+        blocks, unfiltered = self._blocks(names)
+
+        # 无法过滤的名称与所有名称比较
+        for i in unfiltered:
+            for j in self._score_against(names[i], names):
+                if i != j:
+                    pairs.add((min(i, j), max(i, j)))
+
+        for members in blocks:
+            key = tuple(members)
+            if key in seen_blocks:
+                continue
+            seen_blocks.add(key)
+            
+            block_names = [names[i] for i in members]
+            for a, b in self._score_block(block_names):
+                i, j = members[a], members[b]
+                pairs.add((min(i, j), max(i, j)))
+        
+        return pairs
+
+    def _score_against(self, name: str, names: List[str]) -> List[int]:
+        """单个名称与所有名称打分，返回超过阈值的下标"""
+        if HAS_RAPIDFUZZ:
+            row = _rf_process.cdist([name], names, scorer=_rf_fuzz.ratio, score_cutoff=self.threshold)[0]
+            return (row > self.threshold).nonzero()[0].tolist()
+        return [j for j, other in enumerate(names) if _fw_fuzz.ratio(name, other) > self.threshold]
+    
+    def _score_block(self, block_names: List[str]) -> List[Tuple[int, int]]:
+        """块内两两打分，返回超过阈值的下标对"""
+        if HAS_RAPIDFUZZ:
+            matrix = _rf_process.cdist(
+                block_names,
+                block_names,
+                scorer=_rf_fuzz.ratio,
+                score_cutoff=self.threshold
+            )
+            rows, cols = (matrix > self.threshold).nonzero()
+            return [(a, b) for a, b in zip(rows.tolist(), cols.tolist()) if a < b]
+        
+        result = []
+        for a in range(len(block_names)):
+            for b in range(a + 1, len(block_names)):
+                if _fw_fuzz.ratio(block_names[a], block_names[b]) > self.threshold:
+                    result.append((a, b))
+        return result
+
+
+def best_match(name: str, choices: List[str], threshold: float = 85) -> Optional[int]:
+    """
+    在候选名称中查找与 name 最相似的一个
+    
+    Args:
+        choices: 已规范化的候选名称（见 normalize_name）
+    
+    Returns:
+        相似度超过阈值的最佳候选下标，没有则返回 None
+    """
+    if not choices:
+        return None
+    
+    query = normalize_name(name)
+    
+    if HAS_RAPIDFUZZ:
+        match = _rf_process.extractOne(query, choices, scorer=_rf_fuzz.ratio, score_cutoff=threshold)
+        if match and match[1] > threshold:
+            return match[2]
+        return None
+    
+    best_index, best_score = None, threshold
+    for i, choice in enumerate(choices):
+        score = _fw_fuzz.ratio(query, choice)
+        if score > best_score:
+            best_index, best_score = i, score
+    return best_index
@@ -3,14 +3,18 @@
 """
 import json
 import re
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Tuple, Optional, Iterator
 from datetime import datetime
-from fuzzywuzzy import fuzz
 from openai import OpenAI
 
 from src.config import config
+from sqlalchemy import insert, update
+
 from src.database import DiscoveryTask, Competitor, DataSource, SessionLocal
 from src.discovery.search_engine import MultiEngineSearch
+from src.discovery.dedup import CompetitorDeduplicator, compact_name
+from src.discovery.alias_index import CompetitorAliasIndex
 
 
 class CompetitorDiscoverer:
@@ -21,6 +25,8 @@ class CompetitorDiscoverer:
             preferred_engine=search_engine or config.DEFAULT_SEARCH_ENGINE
         )
         self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.deduplicator = CompetitorDeduplicator(threshold=85)
+        self.alias_index = CompetitorAliasIndex(threshold=85)
     
     def discover(
         self,
@@ -56,25 +62,30 @@ class CompetitorDiscoverer:
             print("阶段1: 竞品发现")
             print("="*60)
             competitors = self._discover_competitors(topic, market, target_count, depth)
-            task.competitors_found = len(competitors)
-            task.progress = 50
-            self._update_task(task)
+            self._update_task(task, competitors_found=len(competitors), progress=50)
             
             # 阶段2：搜索数据源
             print("\n" + "="*60)
             print("阶段2: 数据源搜索")
             print("="*60)
-            for comp in competitors:
-                sources = self._discover_data_sources(comp["name"], topic)
-                comp["data_sources"] = sources
+            known = self._resolve_known_competitors(competitors)
+            if known:
+                print(f"  ♻️  {known} 个竞品已在历史任务中发现，复用已有数据源")
+            
+            self._discover_all_data_sources(
+                [c for c in competitors if not c.get("data_sources")], topic, task
+            )
             
             total_sources = sum(len(c.get("data_sources", [])) for c in competitors)
-            task.sources_found = total_sources
-            task.progress = 100
-            task.status = "completed"
-            task.completed_at = datetime.utcnow()
-            task.result_data = {"competitors": competitors}
-            self._update_task(task)
+            self._update_task(
+                task,
+                competitors_found=len(competitors),
+                sources_found=total_sources,
+                progress=100,
+                status="completed",
+                completed_at=datetime.utcnow(),
+                result_data={"competitors": competitors}
+            )
             
             # 保存竞品到数据库
             self._save_competitors(task.id, competitors)
@@ -91,11 +102,29 @@ class CompetitorDiscoverer:
             }
         
         except Exception as e:
-            task.status = "failed"
-            task.result_data = {"error": str(e)}
-            self._update_task(task)
+            self._update_task(task, status="failed", result_data={"error": str(e)})
             raise
     
+    def discover_stream(
+        self,
+        topic: str,
+        market: str = "中国",
+        target_count: int = 5,
+        depth: str = "standard",
+        confidence_threshold: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """
+        流式发现竞品（只包含竞品发现阶段，不搜索数据源、不写数据库）
+        
+        查询按批次执行，每确认一个新竞品（置信度达到阈值）立即产出；
+        当已确认的竞品达到 target_count 且新一批查询不再带来新名称时，停止后续查询
+        
+        Yields:
+            {"name": 产品名, "confidence": 0.95, "reason": ...}
+        """
+        print(f"\n🚀 开始流式竞品发现: {topic}")
+        yield from self._iter_competitors(topic, market, target_count, depth, confidence_threshold)
+    
     def _discover_competitors(
         self,
         topic: str,
@@ -103,7 +132,12 @@ class CompetitorDiscoverer:
         target_count: int,
         depth: str
     ) -> List[Dict]:
-        """发现竞品名称"""
+        """
+        发现竞品名称
+        
+        非流式调用一次性执行全部查询：所有结果统一融合排序后再按 token 预算分批提取，
+        分批提前停止只用于 discover_stream
+        """
         # 构造搜索查询
         queries = self._build_discovery_queries(topic, market, depth)
         
@@ -112,21 +146,15 @@ class CompetitorDiscoverer:
         # 批量搜索
         search_results = self.search_engine.batch_search(queries, num_results=10)
         
-        # 提取竞品
-        all_competitors = []
+        # 融合所有查询的结果（按 URL 去重，RRF 排序），再按 token 预算分批交给 LLM
+        fused_results = self._fuse_search_results(search_results)
+        batches = self._split_by_token_budget(fused_results)
         
-        for query, results in search_results.items():
-            if not results:
-                continue
-            
-            print(f"\n  分析查询: {query} ({len(results)} 条结果)")
-            
-            # 从搜索结果中提取竞品
-            competitors = self._extract_competitors_from_results(
-                topic, results, max_competitors=10
-            )
-            
-            all_competitors.extend(competitors)
+        print(f"\n🔗 融合后 {len(fused_results)} 条唯一结果，分 {len(batches)} 批提取")
+        
+        all_competitors = self._extract_competitors_in_batches(
+            topic, batches, max_competitors=max(10, target_count * 2)
+        )
         
         # 去重和合并
         unique_competitors = self._deduplicate_competitors(all_competitors)
@@ -140,6 +168,92 @@ class CompetitorDiscoverer:
         
         return final_competitors
     
+    def _iter_competitors(
+        self,
+        topic: str,
+        market: str,
+        target_count: int,
+        depth: str,
+        confidence_threshold: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """
+        分批执行发现查询并产出竞品（供 discover_stream 使用）
+        
+        先产出达到置信度阈值的竞品；查询结束后若数量仍不足 target_count，
+        再按置信度补充产出其余候选
+        """
+        threshold = config.DISCOVERY_CONFIDENCE_THRESHOLD if confidence_threshold is None else confidence_threshold
+        wave_size = max(1, config.DISCOVERY_WAVE_SIZE)
+        
+        # 构造搜索查询
+        queries = self._build_discovery_queries(topic, market, depth)
+        
+        print(f"📝 生成 {len(queries)} 个搜索查询，每批 {wave_size} 个")
+        
+        candidates = []
+        seen_urls = set()
+        known_keys = set()  # 已出现过的竞品名称（含别名）
+        yielded_keys = set()
+        confirmed = 0
+        unique_competitors = []
+        
+        for wave_start in range(0, len(queries), wave_size):
+            wave = queries[wave_start:wave_start + wave_size]
+            
+            # 批量搜索
+            search_results = self.search_engine.batch_search(wave, num_results=10)
+            
+            # 融合本批结果（按 URL 去重，RRF 排序），跳过之前批次已分析过的页面
+            fused_results = []
+            for result in self._fuse_search_results(search_results):
+                key = self._result_key(result)
+                if key not in seen_urls:
+                    seen_urls.add(key)
+                    fused_results.append(result)
+            
+            batches = self._split_by_token_budget(fused_results)
+            print(f"\n🔗 第 {wave_start // wave_size + 1} 批: {len(fused_results)} 条新结果，分 {len(batches)} 批提取")
+            
+            candidates.extend(self._extract_competitors_in_batches(
+                topic, batches, max_competitors=max(10, target_count * 2)
+            ))
+            
+            # 去重和合并
+            unique_competitors = self._deduplicate_competitors(candidates)
+            
+            new_names = 0
+            for comp in unique_competitors:
+                keys = {compact_name(name) for name in [comp["name"], *comp.get("aliases", [])]}
+                if not keys & known_keys:
+                    new_names += 1
+                known_keys |= keys
+                
+                if keys & yielded_keys or comp.get("confidence", 0) < threshold:
+                    continue
+                
+                yielded_keys |= keys
+                confirmed += 1
+                print(f"  ✅ 确认竞品: {comp['name']} (置信度: {comp.get('confidence', 0):.2f})")
+                yield comp
+            
+            remaining = len(queries) - (wave_start + len(wave))
+            if remaining and confirmed >= target_count and new_names == 0:
+                print(f"\n⏹️  已确认 {confirmed} 个竞品且新查询没有带来新名称，跳过剩余 {remaining} 个查询")
+                break
+        
+        # 数量不足时按置信度补充
+        if confirmed < target_count:
+            unique_competitors.sort(key=lambda x: x.get("confidence", 0), reverse=True)
+            for comp in unique_competitors:
+                if confirmed >= target_count:
+                    break
+                keys = {compact_name(name) for name in [comp["name"], *comp.get("aliases", [])]}
+                if keys & yielded_keys:
+                    continue
+                yielded_keys |= keys
+                confirmed += 1
+                yield comp
+    
     def _build_discovery_queries(self, topic: str, market: str, depth: str) -> List[str]:
         """构造搜索查询"""
         queries = []
@@ -167,6 +281,91 @@ class CompetitorDiscoverer:
         
         return queries
     
+    def _fuse_search_results(self, search_results: Dict[str, List[Dict]]) -> List[Dict]:
+        """
+        融合多个查询的搜索结果
+        
+        按 URL 去重，使用倒数排名融合 (RRF) 打分：score = Σ 1 / (k + rank)，
+        被多个查询同时排在前面的页面得分更高
+        """
+        k = config.DISCOVERY_RRF_K
+        fused = {}
+        
+        for results in search_results.values():
+            for rank, result in enumerate(results, 1):
+                key = self._result_key(result)
+                if not key:
+                    continue
+                
+                item = fused.get(key)
+                if item is None:
+                    item = {**result, "rrf_score": 0.0, "query_count": 0}
+                    fused[key] = item
+                
+                item["rrf_score"] += 1.0 / (k + rank)
+                item["query_count"] += 1
+        
+        return sorted(fused.values(), key=lambda x: x["rrf_score"], reverse=True)
+    
+    @staticmethod
+    def _result_key(result: Dict) -> str:
+        """搜索结果去重键"""
+        return (result.get("url") or result.get("title", "")).strip().rstrip("/").lower()
+    
+    def _split_by_token_budget(self, results: List[Dict]) -> List[List[Dict]]:
+        """按 token 预算把结果切分成若干批，超过最大批数的低分结果直接丢弃"""
+        budget = config.DISCOVERY_CONTEXT_TOKEN_BUDGET
+        batches = []
+        current = []
+        used = 0
+        
+        for result in results:
+            tokens = self._estimate_tokens(f"{result.get('title', '')}\n{result.get('snippet', '')}")
+            if current and used + tokens > budget:
+                batches.append(current)
+                if len(batches) >= config.DISCOVERY_MAX_LLM_CALLS:
+                    return batches
+                current = []
+                used = 0
+            
+            current.append(result)
+            used += tokens
+        
+        if current:
+            batches.append(current)
+        
+        return batches
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗略估算 token 数：中日韩字符约 1 token/字，其他约 4 字符/token"""
+        cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+        return cjk + (len(text) - cjk) // 4 + 1
+    
+    def _extract_competitors_in_batches(
+        self,
+        topic: str,
+        batches: List[List[Dict]],
+        max_competitors: int = 10
+    ) -> List[Dict]:
+        """并发提取各批结果中的竞品"""
+        if not batches:
+            return []
+        
+        if len(batches) == 1:
+            return self._extract_competitors_from_results(topic, batches[0], max_competitors)
+        
+        all_competitors = []
+        with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            futures = [
+                executor.submit(self._extract_competitors_from_results, topic, batch, max_competitors)
+                for batch in batches
+            ]
+            for future in futures:
+                all_competitors.extend(future.result())
+        
+        return all_competitors
+    
     def _extract_competitors_from_results(
         self,
         topic: str,
@@ -176,7 +375,7 @@ class CompetitorDiscoverer:
         """使用 LLM 从搜索结果中提取竞品"""
         # 合并搜索结果文本
         context = ""
-        for i, result in enumerate(search_results[:5], 1):  # 只取前5条
+        for i, result in enumerate(search_results, 1):
             context += f"{i}. {result['title']}\n{result['snippet']}\n\n"
         
         prompt = f"""你是一位专业的市场研究分析师。请从以下搜索结果中提取所有提到的 "{topic}" 相关产品/工具的名称。
@@ -219,37 +418,50 @@ class CompetitorDiscoverer:
             return []
     
     def _deduplicate_competitors(self, competitors: List[Dict]) -> List[Dict]:
-        """去重和合并竞品"""
-        unique = []
+        """去重和合并竞品（与输入顺序无关）"""
+        return self.deduplicator.deduplicate(competitors)
+    
+    def _resolve_known_competitors(self, competitors: List[Dict]) -> int:
+        """
+        用别名索引识别历史任务中已发现的竞品
         
+        已知竞品记录 competitor_id，并直接复用其数据源（不再重复搜索）；
+        多个候选对应同一个已知竞品时合并为一个（原地修改 competitors）
+        
+        Returns:
+            已知竞品数量
+        """
+        self.alias_index.load()
+        
+        resolved = []
+        by_id: Dict[int, Dict] = {}
         for comp in competitors:
-            is_duplicate = False
-            comp_name = comp["name"].lower().strip()
+            competitor_id = self.alias_index.match([comp["name"], *comp.get("aliases", [])])
+            if competitor_id is None:
+                resolved.append(comp)
+                continue
             
-            for existing in unique:
-                existing_name = existing["name"].lower().strip()
-                
-                # 使用模糊匹配判断相似度
-                similarity = fuzz.ratio(comp_name, existing_name)
-                
-                if similarity > 85:  # 相似度阈值
-                    # 合并置信度（取最高值）
-                    existing["confidence"] = max(
-                        existing.get("confidence", 0),
-                        comp.get("confidence", 0)
-                    )
-                    is_duplicate = True
-                    break
+            existing = by_id.get(competitor_id)
+            if existing is not None:
+                # 置信度更高的候选在前，其余名称并入别名
+                names = {comp["name"], *comp.get("aliases", []), *existing.get("aliases", [])}
+                existing["aliases"] = sorted(names - {existing["name"]})
+                existing["confidence"] = max(existing.get("confidence", 0), comp.get("confidence", 0))
+                print(f"  🔗 {comp['name']} 与 {existing['name']} 是同一个已知竞品，已合并")
+                continue
             
-            if not is_duplicate:
-                unique.append(comp)
+            comp["competitor_id"] = competitor_id
+            sources = self.alias_index.load_sources(competitor_id)
+            if sources:
+                comp["data_sources"] = sources
+            by_id[competitor_id] = comp
+            resolved.append(comp)
         
-        return unique
+        competitors[:] = resolved
+        return len(by_id)
     
-    def _discover_data_sources(self, competitor_name: str, topic: str) -> List[Dict]:
-        """为单个竞品发现数据源"""
-        print(f"\n  🔍 搜索 {competitor_name} 的数据源...")
-        
+    def _build_source_queries(self, competitor_name: str) -> Dict[str, str]:
+        """构造数据源搜索查询 {数据源类型: 查询}"""
         # 数据源搜索模板
         source_queries = {
             "官网": [
@@ -270,25 +482,74 @@ class CompetitorDiscoverer:
             ]
         }
         
-        all_sources = []
+        # 只搜索第一个查询（节省成本）
+        return {source_type: queries[0] for source_type, queries in source_queries.items()}
+    
+    def _build_sources(self, source_type: str, results: List[Dict]) -> List[Dict]:
+        """把搜索结果转换为数据源"""
+        sources = []
+        for result in results[:2]:  # 每种类型取前2个
+            sources.append({
+                "type": source_type,
+                "url": result["url"],
+                "title": result["title"],
+                "priority": self._get_priority(source_type),
+                "quality_score": 0.8  # 默认评分
+            })
+        return sources
+    
+    def _discover_all_data_sources(
+        self,
+        competitors: List[Dict],
+        topic: str,
+        task: Optional[DiscoveryTask] = None
+    ):
+        """
+        批量为所有竞品发现数据源
+        
+        每个竞品的查询作为一块，由有限的线程池并发执行；块内查询通过 batch_search 提交
+        （缓存未命中的查询由 Serper 合并为批量请求）。每块完成即写入该竞品的 data_sources，
+        任务进度从 50 逐步推进到 100（不含）
+        """
+        plans = [(comp, self._build_source_queries(comp["name"])) for comp in competitors]
+        plans = [(comp, queries) for comp, queries in plans if queries]
+        if not plans:
+            return
         
-        for source_type, queries in source_queries.items():
-            # 只搜索第一个查询（节省成本）
-            query = queries[0]
-            results = self.search_engine.search(query, num_results=3)
-            
-            if results:
-                for result in results[:2]:  # 每种类型取前2个
-                    all_sources.append({
-                        "type": source_type,
-                        "url": result["url"],
-                        "title": result["title"],
-                        "priority": self._get_priority(source_type),
-                        "quality_score": 0.8  # 默认评分
-                    })
+        total = len(plans)
+        print(f"\n  🔍 批量搜索 {total} 个竞品的数据源 ({sum(len(q) for _, q in plans)} 个查询)")
+        
+        def search_chunk(source_queries: Dict[str, str]) -> Dict[str, List[Dict]]:
+            return self.search_engine.batch_search(list(source_queries.values()), num_results=3)
         
-        print(f"    找到 {len(all_sources)} 个数据源")
-        return all_sources
+        done = 0
+        with ThreadPoolExecutor(max_workers=min(config.SEARCH_MAX_WORKERS, total)) as executor:
+            futures = {
+                executor.submit(search_chunk, source_queries): (comp, source_queries)
+                for comp, source_queries in plans
+            }
+            
+            for future in as_completed(futures):
+                comp, source_queries = futures[future]
+                try:
+                    search_results = future.result()
+                except Exception as e:
+                    print(f"    ❌ {comp['name']} 数据源搜索失败: {e}")
+                    search_results = {}
+                
+                # 按模板顺序拼装，保证结果稳定
+                comp["data_sources"] = [
+                    source
+                    for source_type, query in source_queries.items()
+                    for source in self._build_sources(source_type, search_results.get(query, []))
+                ]
+                print(f"    ✅ {comp['name']}: 找到 {len(comp['data_sources'])} 个数据源")
+                
+                done += 1
+                if task is not None:
+                    progress = 50 + int(49 * done / total)
+                    if progress != task.progress:
+                        self._update_task(task, progress=progress)
     
     def _get_priority(self, source_type: str) -> int:
         """获取数据源优先级"""
@@ -321,43 +582,81 @@ class CompetitorDiscoverer:
         finally:
             db.close()
     
-    def _update_task(self, task: DiscoveryTask):
-        """更新任务"""
+    def _update_task(self, task: DiscoveryTask, **fields):
+        """更新任务（只 UPDATE 变化的字段，不做整行 merge）"""
+        for name, value in fields.items():
+            setattr(task, name, value)
+        
         db = SessionLocal()
         try:
-            db.merge(task)
+            db.execute(
+                update(DiscoveryTask)
+                .where(DiscoveryTask.id == task.id)
+                .values(**fields)
+            )
             db.commit()
         finally:
             db.close()
     
     def _save_competitors(self, task_id: int, competitors: List[Dict]):
-        """保存竞品到数据库"""
+        """
+        批量保存竞品和数据源（单个事务）
+        
+        已知竞品（见 _resolve_known_competitors）不重复创建，只登记新别名、补充缺失的数据源
+        """
         db = SessionLocal()
         try:
+            # 新竞品：批量插入并按参数顺序取回 ID
+            new_competitors = [c for c in competitors if c.get("competitor_id") is None]
+            if new_competitors:
+                ids = db.execute(
+                    insert(Competitor).returning(Competitor.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "name": comp_data["name"],
+                            "discovery_task_id": task_id,
+                            "confidence": comp_data.get("confidence", 0.5),
+                            "status": "active"
+                        }
+                        for comp_data in new_competitors
+                    ]
+                ).scalars().all()
+                
+                for comp_data, competitor_id in zip(new_competitors, ids):
+                    comp_data["competitor_id"] = competitor_id
+            
+            alias_rows = []
+            source_rows = []
             for comp_data in competitors:
-                # 创建竞品
-                competitor = Competitor(
-                    name=comp_data["name"],
-                    discovery_task_id=task_id,
-                    confidence=comp_data.get("confidence", 0.5),
-                    status="active"
-                )
-                db.add(competitor)
-                db.flush()  # 获取 ID
+                competitor_id = comp_data["competitor_id"]
+                alias_rows.extend(self.alias_index.register(
+                    competitor_id, [comp_data["name"], *comp_data.get("aliases", [])]
+                ))
                 
-                # 创建数据源
+                # 复用的数据源已在库中
                 for source_data in comp_data.get("data_sources", []):
-                    data_source = DataSource(
-                        competitor_id=competitor.id,
-                        source_type=source_data["type"],
-                        url=source_data["url"],
-                        priority=source_data["priority"],
-                        quality_score=source_data.get("quality_score", 0.8),
-                        auto_discovered=True,
-                        status="active"
-                    )
-                    db.add(data_source)
+                    if source_data.get("source_id"):
+                        continue
+                    
+                    source_rows.append({
+                        "competitor_id": competitor_id,
+                        "source_type": source_data["type"],
+                        "url": source_data["url"],
+                        "priority": source_data["priority"],
+                        "quality_score": source_data.get("quality_score", 0.8),
+                        "auto_discovered": True,
+                        "status": "active"
+                    })
+            
+            if alias_rows:
+                self.alias_index.save(db, alias_rows)
+            if source_rows:
+                db.execute(insert(DataSource), source_rows)
             
             db.commit()
+        except Exception:
+            db.rollback()
+            self.alias_index.load()  # 回滚后丢弃未落库的别名
+            raise
         finally:
             db.close()
@@ -0,0 +1,257 @@
+"""
+两级搜索缓存（进程内 LRU + SearchCache 表）
+"""
+import atexit
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.config import config
+from src.database import SearchCache, SessionLocal, upsert
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询：全角转半角、小写、合并空白"""
+    query = unicodedata.normalize("NFKC", query)
+    return _WHITESPACE_RE.sub(" ", query).strip().lower()
+
+
+def make_cache_key(query: str, gl: str = "", hl: str = "") -> str:
+    """
+    生成缓存键
+    
+    结果数量不参与缓存键：同一查询只保留一份结果集，
+    数量更少的请求直接从更大的结果集截取
+    """
+    return f"{normalize_query(query)}|gl={(gl or '').lower()}|hl={(hl or '').lower()}"
+
+
+class _MemoryEntry:
+    """内存缓存条目"""
+    
+    __slots__ = ("results", "num_results", "expires_at", "hit_count")
+    
+    def __init__(self, results: List[Dict], num_results: int, expires_at: float, hit_count: int = 0):
+        self.results = results
+        self.num_results = num_results
+        self.expires_at = expires_at
+        self.hit_count = hit_count
+    
+    def covers(self, num_results: int) -> bool:
+        """是否能满足指定数量的请求（结果不足说明服务商已无更多结果）"""
+        return self.num_results >= num_results or len(self.results) < self.num_results
+
+
+class SearchResultCache:
+    """
+    两级搜索缓存
+    
+    - 第一级：进程内 LRU，带容量和 TTL 限制，热点查询不再访问 SQLite
+    - 第二级：SearchCache 表，跨进程、跨运行持久化
+    - 命中计数先在内存累计，达到阈值后批量写回数据库
+    - 空结果只做内存级负缓存（较短 TTL），不写入数据库
+    - 缓存键为规范化后的查询 + 地区/语言，数量更少的请求复用更大的结果集
+    """
+    
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        ttl: Optional[int] = None,
+        negative_ttl: Optional[int] = None,
+        flush_threshold: Optional[int] = None
+    ):
+        self.max_size = max_size or config.SEARCH_MEMORY_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else config.SEARCH_MEMORY_CACHE_TTL
+        self.negative_ttl = negative_ttl if negative_ttl is not None else config.SEARCH_NEGATIVE_CACHE_TTL
+        self.flush_threshold = flush_threshold or config.SEARCH_HIT_FLUSH_THRESHOLD
+        
+        self._entries: "OrderedDict[str, _MemoryEntry]" = OrderedDict()
+        self._pending_hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def get(
+        self,
+        query: str,
+        num_results: int = 10,
+        gl: str = "",
+        hl: str = ""
+    ) -> Optional[List[Dict]]:
+        """
+        查询缓存
+        
+        Returns:
+            命中时返回前 num_results 条结果（负缓存命中返回空列表），未命中返回 None
+        """
+        key = make_cache_key(query, gl, hl)
+        
+        entry = self._get_memory(key)
+        if entry is None or not entry.covers(num_results):
+            entry = self._load_from_db(key)
+        
+        if entry is None or not entry.covers(num_results):
+            return None
+        
+        if entry.results:
+            self._record_hit(key)
+            print(f"  📦 使用缓存结果 (命中次数: {entry.hit_count})")
+        
+        return entry.results[:num_results]
+    
+    def set(
+        self,
+        query: str,
+        results: List[Dict],
+        engine: str,
+        num_results: int = 10,
+        gl: str = "",
+        hl: str = ""
+    ):
+        """
+        写入缓存（空结果只进入内存负缓存）
+        
+        Args:
+            num_results: 向服务商请求的结果数量
+        """
+        key = make_cache_key(query, gl, hl)
+        
+        if not results:
+            self._put_memory(key, [], num_results, time.monotonic() + self.negative_ttl)
+            return
+        
+        now = datetime.utcnow()
+        values = {
+            "query": query,
+            "gl": gl,
+            "hl": hl,
+            "num_results": num_results,
+            "search_engine": engine,
+            "results": results,
+            "cached_at": now,
+            "expires_at": now + timedelta(days=config.CACHE_EXPIRY_DAYS),
+        }
+        
+        db = SessionLocal()
+        try:
+            # 对冲请求时两个引擎可能同时写入同一个缓存键
+            upsert(db, SearchCache, {"cache_key": key, **values}, ["cache_key"], list(values))
+            db.commit()
+        except SQLAlchemyError as e:
+            # 缓存写入失败不影响搜索
+            db.rollback()
+            print(f"  ⚠️  搜索缓存写入失败: {e}")
+        finally:
+            db.close()
+        
+        self._put_memory(key, results, num_results, time.monotonic() + self.ttl)
+    
+    def flush_hits(self):
+        """把累计的命中次数批量写回数据库"""
+        with self._lock:
+            pending = self._pending_hits
+            self._pending_hits = {}
+        
+        if not pending:
+            return
+        
+        db = SessionLocal()
+        try:
+            for key, count in pending.items():
+                db.execute(
+                    update(SearchCache)
+                    .where(SearchCache.cache_key == key)
+                    .values(hit_count=SearchCache.hit_count + count)
+                )
+            db.commit()
+        except Exception as e:
+            print(f"  ⚠️  缓存命中计数写回失败: {e}")
+        finally:
+            db.close()
+    
+    def clear(self):
+        """清空内存缓存（不影响数据库）"""
+        self.flush_hits()
+        with self._lock:
+            self._entries.clear()
+    
+    def _get_memory(self, key: str) -> Optional[_MemoryEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return entry
+    
+    def _put_memory(
+        self,
+        key: str,
+        results: List[Dict],
+        num_results: int,
+        expires_at: float,
+        hit_count: int = 0
+    ) -> _MemoryEntry:
+        entry = _MemoryEntry(results, num_results, expires_at, hit_count)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return entry
+    
+    def _load_from_db(self, key: str) -> Optional[_MemoryEntry]:
+        now = datetime.utcnow()
+        
+        db = SessionLocal()
+        try:
+            cache = db.query(SearchCache).filter(
+                SearchCache.cache_key == key,
+                SearchCache.expires_at > now
+            ).first()
+            
+            if not cache or not cache.results:
+                return None
+            
+            results = cache.results
+            num_results = cache.num_results or len(results)
+            hit_count = cache.hit_count or 0
+            db_ttl = (cache.expires_at - now).total_seconds()
+        except SQLAlchemyError as e:
+            # 缓存表不可用时按未命中处理
+            print(f"  ⚠️  搜索缓存读取失败: {e}")
+            return None
+        finally:
+            db.close()
+        
+        # 内存条目不能比数据库条目活得更久
+        expires_at = time.monotonic() + min(self.ttl, db_ttl)
+        return self._put_memory(key, results, num_results, expires_at, hit_count)
+    
+    def _record_hit(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.hit_count += 1
+            self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+            should_flush = sum(self._pending_hits.values()) >= self.flush_threshold
+        
+        if should_flush:
+            self.flush_hits()
+
+
+# 进程内共享的缓存实例
+search_cache = SearchResultCache()
+atexit.register(search_cache.flush_hits)
@@ -2,109 +2,301 @@
 搜索引擎集成模块
 """
 import json
+import threading
 import time
-from typing import List, Dict, Optional
-import requests
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Tuple
 
 from src.config import config
-from src.database import SearchCache, SessionLocal
+from src.discovery.search_cache import search_cache
+from src.utils.rate_limiter import get_rate_limiter
+from src.utils.circuit_breaker import CircuitBreaker, LatencyTracker
+from src.utils.http_client import HTTPClientError, get_http_client
+
+
+class SearchEngineError(Exception):
+    """搜索请求失败"""
+
+
+class SearchEngineNotConfigured(SearchEngineError):
+    """搜索引擎未配置 API Key"""
 
 
 class SearchEngine:
     """搜索引擎基类"""
     
+    name = "base"
+    default_gl = "cn"
+    default_hl = "zh-cn"
+    
     def __init__(self, use_cache: bool = True):
         self.use_cache = use_cache
+        rate, burst = config.get_search_rate_limit(self.name)
+        self.rate_limiter = get_rate_limiter(f"search:{self.name}", rate, burst)
+        self.breaker = CircuitBreaker(
+            failure_threshold=config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            cooldown=config.CIRCUIT_BREAKER_COOLDOWN
+        )
+        self.latency = LatencyTracker()
+        self.http = get_http_client()
     
-    def search(self, query: str, num_results: int = 10) -> List[Dict]:
-        """搜索接口"""
+    def is_configured(self) -> bool:
+        """是否已配置 API Key"""
+        return True
+    
+    def search(
+        self,
+        query: str,
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        搜索（先查缓存，失败时返回空列表）
+        
+        Args:
+            query: 搜索查询
+            num_results: 返回结果数量
+            gl: 地区代码 (cn=中国)
+            hl: 语言代码 (zh-cn=简体中文)
+        """
+        cached = self.lookup_cache(query, num_results, gl, hl)
+        if cached is not None:
+            return cached
+        
+        try:
+            return self.fetch(query, num_results, gl, hl)
+        except SearchEngineNotConfigured as e:
+            print(f"  ⚠️  {e}，跳过")
+        except SearchEngineError as e:
+            print(f"  ❌ {self.name} 搜索失败: {e}")
+        return []
+    
+    def lookup_cache(
+        self,
+        query: str,
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> Optional[List[Dict]]:
+        """只查缓存，未命中返回 None"""
+        return self._get_cached_results(
+            query, num_results, gl or self.default_gl, hl or self.default_hl
+        )
+    
+    def fetch(
+        self,
+        query: str,
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        直接请求服务商（不查缓存，结果写入缓存）
+        
+        Raises:
+            SearchEngineError: 未配置或请求失败
+        """
+        if not self.is_configured():
+            raise SearchEngineNotConfigured(f"未配置 {self.name} 搜索 API")
+        
+        gl = gl or self.default_gl
+        hl = hl or self.default_hl
+        fetch_size = self._fetch_size(num_results)
+        
+        try:
+            results = self._request(query, fetch_size, gl, hl)
+        except (HTTPClientError, ValueError) as e:
+            raise SearchEngineError(str(e)) from e
+        
+        self._save_to_cache(query, results, self.name, fetch_size, gl, hl)
+        return results[:num_results]
+    
+    def search_many(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        批量搜索：先逐条查缓存，未命中的查询一次性交给 fetch_many
+        
+        Returns:
+            {query: results}，顺序与输入一致，失败的查询结果为空列表
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        results = {}
+        misses = []
+        
+        for query in unique_queries:
+            cached = self.lookup_cache(query, num_results, gl, hl)
+            if cached is not None:
+                results[query] = cached
+            else:
+                misses.append(query)
+        
+        if misses:
+            try:
+                results.update(self.fetch_many(misses, num_results, gl, hl))
+            except SearchEngineNotConfigured as e:
+                print(f"  ⚠️  {e}，跳过")
+            except SearchEngineError as e:
+                print(f"  ❌ {self.name} 批量搜索失败: {e}")
+        
+        return {query: results.get(query, []) for query in unique_queries}
+    
+    def fetch_many(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        批量请求服务商（不查缓存，结果逐条写入缓存）
+        
+        默认实现为并发逐条请求，有批量接口的引擎可覆盖此方法
+        
+        Returns:
+            {query: results}，只包含成功的查询
+        
+        Raises:
+            SearchEngineNotConfigured: 未配置
+        """
+        if not self.is_configured():
+            raise SearchEngineNotConfigured(f"未配置 {self.name} 搜索 API")
+        
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return {}
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(config.SEARCH_MAX_WORKERS, len(unique_queries))) as executor:
+            futures = {
+                executor.submit(self.fetch, query, num_results, gl, hl): query
+                for query in unique_queries
+            }
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    results[query] = future.result()
+                except SearchEngineError as e:
+                    print(f"  ❌ {self.name} 搜索失败 {query}: {e}")
+        
+        return results
+    
+    def _request(self, query: str, num_results: int, gl: str, hl: str) -> List[Dict]:
+        """向服务商发送请求（子类实现）"""
         raise NotImplementedError
     
-    def _get_cached_results(self, query: str) -> Optional[List[Dict]]:
-        """从缓存获取结果"""
+    def _wait_for_quota(self):
+        """等待服务商配额（只在真正请求 API 前调用，缓存命中不消耗配额）"""
+        waited = self.rate_limiter.acquire()
+        if waited > 0.5:
+            print(f"  ⏳ {self.name} 限流等待 {waited:.1f}s")
+    
+    def _fetch_size(self, num_results: int) -> int:
+        """
+        实际向服务商请求的结果数量
+        
+        一次请求 10 条与 3 条的费用相同，统一多取一些，后续数量更少的请求可直接复用
+        """
+        return max(num_results, config.SEARCH_RESULTS_PER_QUERY)
+    
+    def _get_cached_results(
+        self,
+        query: str,
+        num_results: int = 10,
+        gl: str = "",
+        hl: str = ""
+    ) -> Optional[List[Dict]]:
+        """从缓存获取结果（空列表表示命中负缓存）"""
         if not self.use_cache:
             return None
         
-        db = SessionLocal()
-        try:
-            cache = db.query(SearchCache).filter(
-                SearchCache.query == query,
-                SearchCache.expires_at > datetime.utcnow()
-            ).first()
-            
-            if cache:
-                cache.hit_count += 1
-                db.commit()
-                print(f"  📦 使用缓存结果 (命中次数: {cache.hit_count})")
-                return cache.results
-        finally:
-            db.close()
-        
-        return None
+        return search_cache.get(query, num_results, gl, hl)
     
-    def _save_to_cache(self, query: str, results: List[Dict], engine: str):
+    def _save_to_cache(
+        self,
+        query: str,
+        results: List[Dict],
+        engine: str,
+        num_results: int = 10,
+        gl: str = "",
+        hl: str = ""
+    ):
         """保存到缓存"""
         if not self.use_cache:
             return
         
-        db = SessionLocal()
-        try:
-            expires_at = datetime.utcnow() + timedelta(days=config.CACHE_EXPIRY_DAYS)
-            
-            # 检查是否已存在
-            cache = db.query(SearchCache).filter(SearchCache.query == query).first()
-            if cache:
-                cache.results = results
-                cache.cached_at = datetime.utcnow()
-                cache.expires_at = expires_at
-                cache.search_engine = engine
-            else:
-                cache = SearchCache(
-                    query=query,
-                    search_engine=engine,
-                    results=results,
-                    expires_at=expires_at
-                )
-                db.add(cache)
-            
-            db.commit()
-        finally:
-            db.close()
+        search_cache.set(query, results, engine, num_results, gl, hl)
 
 
 class SerperSearch(SearchEngine):
     """Serper API 搜索"""
     
+    name = "serper"
+    
     def __init__(self, api_key: Optional[str] = None, use_cache: bool = True):
         super().__init__(use_cache)
         self.api_key = api_key or config.SERPER_API_KEY
         self.base_url = "https://google.serper.dev/search"
     
-    def search(self, query: str, num_results: int = 10, gl: str = "cn", hl: str = "zh-cn") -> List[Dict]:
+    def is_configured(self) -> bool:
+        return bool(self.api_key)
+    
+    def fetch_many(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
         """
-        使用 Serper API 搜索
+        使用 Serper 批量接口：一次 POST 提交多个查询，再按查询拆分写入缓存
         
-        Args:
-            query: 搜索查询
-            num_results: 返回结果数量
-            gl: 地区代码 (cn=中国)
-            hl: 语言代码 (zh-cn=简体中文)
+        Raises:
+            SearchEngineError: 未配置或批量请求失败
         """
-        # 检查缓存
-        cached = self._get_cached_results(query)
-        if cached:
-            return cached[:num_results]
+        if not self.is_configured():
+            raise SearchEngineNotConfigured(f"未配置 {self.name} 搜索 API")
         
-        if not self.api_key:
-            print("  ⚠️  未配置 SERPER_API_KEY，跳过")
-            return []
+        unique_queries = list(dict.fromkeys(queries))
+        if len(unique_queries) == 1:
+            return {unique_queries[0]: self.fetch(unique_queries[0], num_results, gl, hl)}
         
-        headers = {
-            "X-API-KEY": self.api_key,
-            "Content-Type": "application/json"
-        }
+        gl = gl or self.default_gl
+        hl = hl or self.default_hl
+        fetch_size = self._fetch_size(num_results)
+        batch_size = config.SERPER_BATCH_SIZE
         
+        results = {}
+        for i in range(0, len(unique_queries), batch_size):
+            chunk = unique_queries[i:i + batch_size]
+            payload = [
+                {"q": query, "num": fetch_size, "gl": gl, "hl": hl}
+                for query in chunk
+            ]
+            
+            try:
+                data = self._post(payload)
+            except (HTTPClientError, ValueError) as e:
+                raise SearchEngineError(str(e)) from e
+            
+            # 批量接口按提交顺序返回结果列表
+            if not isinstance(data, list) or len(data) != len(chunk):
+                raise SearchEngineError("批量接口返回的结果数量与查询数量不一致")
+            
+            for query, item in zip(chunk, data):
+                query_results = self._parse_results(item, fetch_size)
+                self._save_to_cache(query, query_results, self.name, fetch_size, gl, hl)
+                results[query] = query_results[:num_results]
+        
+        return results
+    
+    def _request(self, query: str, num_results: int, gl: str, hl: str) -> List[Dict]:
+        """使用 Serper API 搜索"""
         payload = {
             "q": query,
             "num": num_results,
@@ -112,103 +304,174 @@ class SerperSearch(SearchEngine):
             "hl": hl
         }
         
-        try:
-            response = requests.post(
-                self.base_url,
-                json=payload,
-                headers=headers,
-                timeout=config.REQUEST_TIMEOUT
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            # 提取有机搜索结果
-            results = []
-            for item in data.get("organic", [])[:num_results]:
-                results.append({
-                    "title": item.get("title", ""),
-                    "url": item.get("link", ""),
-                    "snippet": item.get("snippet", ""),
-                    "source": "serper"
-                })
-            
-            # 保存到缓存
-            self._save_to_cache(query, results, "serper")
-            
-            return results
+        return self._parse_results(self._post(payload), num_results)
+    
+    def _post(self, payload):
+        """发送请求（payload 为列表时走批量接口）"""
+        headers = {
+            "X-API-KEY": self.api_key,
+            "Content-Type": "application/json"
+        }
         
-        except requests.exceptions.RequestException as e:
-            print(f"  ❌ Serper 搜索失败: {e}")
-            return []
+        self._wait_for_quota()
+        
+        response = self.http.post(
+            self.base_url,
+            json=payload,
+            headers=headers,
+            timeout=config.REQUEST_TIMEOUT
+        )
+        return response.json()
+    
+    def _parse_results(self, data: Dict, num_results: int) -> List[Dict]:
+        """提取有机搜索结果"""
+        results = []
+        for item in data.get("organic", [])[:num_results]:
+            results.append({
+                "title": item.get("title", ""),
+                "url": item.get("link", ""),
+                "snippet": item.get("snippet", ""),
+                "source": "serper"
+            })
+        
+        return results
 
 
 class GoogleSearch(SearchEngine):
     """Google Custom Search API"""
     
+    name = "google"
+    default_hl = "zh-CN"
+    
     def __init__(self, api_key: Optional[str] = None, search_engine_id: Optional[str] = None, use_cache: bool = True):
         super().__init__(use_cache)
         self.api_key = api_key or config.GOOGLE_SEARCH_API_KEY
         self.search_engine_id = search_engine_id or config.GOOGLE_SEARCH_ENGINE_ID
         self.base_url = "https://www.googleapis.com/customsearch/v1"
+        self._page_executor = ThreadPoolExecutor(
+            max_workers=config.SEARCH_MAX_WORKERS,
+            thread_name_prefix="google-page"
+        )
+    
+    def is_configured(self) -> bool:
+        return bool(self.api_key and self.search_engine_id)
     
-    def search(self, query: str, num_results: int = 10, gl: str = "cn", hl: str = "zh-CN") -> List[Dict]:
-        """使用 Google Custom Search API"""
-        # 检查缓存
-        cached = self._get_cached_results(query)
-        if cached:
-            return cached[:num_results]
+    def _request(self, query: str, num_results: int, gl: str, hl: str) -> List[Dict]:
+        """
+        使用 Google Custom Search API
         
-        if not self.api_key or not self.search_engine_id:
-            print("  ⚠️  未配置 Google Search API，跳过")
-            return []
+        Google API 一次最多返回10条，各页偏移量预先已知，因此并发请求所有页（受引擎限流约束），
+        按排名顺序合并，凑够数量或遇到不满的一页后取消剩余请求
+        """
+        starts = list(range(1, min(num_results + 1, 100), 10))
+        page_sizes = {start: min(10, num_results - (start - 1)) for start in starts}
+        
+        if len(starts) == 1:
+            return self._request_page(query, 1, page_sizes[1], gl, hl)[:num_results]
+        
+        stop = threading.Event()
+        futures = {
+            self._page_executor.submit(
+                self._request_page, query, start, page_sizes[start], gl, hl, stop
+            ): start
+            for start in starts
+        }
         
+        pages = {}
+        results = []
         try:
-            results = []
-            # Google API 一次最多返回10条
-            for start in range(1, min(num_results + 1, 100), 10):
-                params = {
-                    "key": self.api_key,
-                    "cx": self.search_engine_id,
-                    "q": query,
-                    "num": min(10, num_results - len(results)),
-                    "start": start,
-                    "gl": gl,
-                    "hl": hl
-                }
-                
-                response = requests.get(
-                    self.base_url,
-                    params=params,
-                    timeout=config.REQUEST_TIMEOUT
-                )
-                response.raise_for_status()
-                data = response.json()
-                
-                for item in data.get("items", []):
-                    results.append({
-                        "title": item.get("title", ""),
-                        "url": item.get("link", ""),
-                        "snippet": item.get("snippet", ""),
-                        "source": "google"
-                    })
-                
-                if len(results) >= num_results:
+            for future in as_completed(futures):
+                pages[futures[future]] = future.result()
+                results, complete = self._merge_pages(pages, starts, page_sizes, num_results)
+                if complete:
                     break
-                
-                time.sleep(0.5)  # 避免频繁请求
+        finally:
+            stop.set()
+            for future in futures:
+                future.cancel()
+        
+        return results[:num_results]
+    
+    def _request_page(
+        self,
+        query: str,
+        start: int,
+        page_size: int,
+        gl: str,
+        hl: str,
+        stop: Optional[threading.Event] = None
+    ) -> List[Dict]:
+        """请求单页结果（已取消时直接返回空列表）"""
+        if stop is not None and stop.is_set():
+            return []
+        
+        self._wait_for_quota()
+        
+        if stop is not None and stop.is_set():
+            return []
+        
+        params = {
+            "key": self.api_key,
+            "cx": self.search_engine_id,
+            "q": query,
+            "num": page_size,
+            "start": start,
+            "gl": gl,
+            "hl": hl
+        }
+        
+        response = self.http.get(
+            self.base_url,
+            params=params,
+            timeout=config.REQUEST_TIMEOUT
+        )
+        data = response.json()
+        
+        results = []
+        for item in data.get("items", []):
+            results.append({
+                "title": item.get("title", ""),
+                "url": item.get("link", ""),
+                "snippet": item.get("snippet", ""),
+                "source": "google"
+            })
+        
+        return results
+    
+    @staticmethod
+    def _merge_pages(
+        pages: Dict[int, List[Dict]],
+        starts: List[int],
+        page_sizes: Dict[int, int],
+        num_results: int
+    ) -> Tuple[List[Dict], bool]:
+        """
+        按排名顺序合并已返回的连续页
+        
+        Returns:
+            (合并结果, 是否已完成)
+        """
+        results = []
+        for start in starts:
+            if start not in pages:
+                return results, False
             
-            # 保存到缓存
-            self._save_to_cache(query, results, "google")
+            results.extend(pages[start])
             
-            return results[:num_results]
+            # 凑够数量，或这一页不满说明已经没有更多结果
+            if len(results) >= num_results or len(pages[start]) < page_sizes[start]:
+                return results, True
         
-        except requests.exceptions.RequestException as e:
-            print(f"  ❌ Google 搜索失败: {e}")
-            return []
+        return results, True
 
 
 class MultiEngineSearch:
-    """多引擎搜索（自动降级）"""
+    """
+    多引擎搜索（对冲请求 + 熔断）
+    
+    - 首选引擎超过其历史延迟的指定百分位仍未返回时，并发请求备用引擎，取先返回的有效结果
+    - 连续失败的引擎会被熔断，冷却期内直接跳过
+    """
     
     def __init__(self, preferred_engine: str = "serper"):
         self.preferred_engine = preferred_engine
@@ -216,35 +479,192 @@ class MultiEngineSearch:
             "serper": SerperSearch(),
             "google": GoogleSearch()
         }
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=config.SEARCH_MAX_WORKERS * len(self.engines),
+            thread_name_prefix="search-hedge"
+        )
+    
+    def _engine_order(self) -> List[str]:
+        """按优先级返回可用引擎（已配置且未熔断）"""
+        names = sorted(self.engines, key=lambda name: name != self.preferred_engine)
+        available = []
+        for name in names:
+            engine = self.engines[name]
+            if not engine.is_configured():
+                continue
+            if engine.breaker.state == CircuitBreaker.OPEN:
+                print(f"  ⛔ {name} 已熔断，跳过")
+                continue
+            available.append(name)
+        return available
+    
+    def _hedge_delay(self, engine_name: str) -> float:
+        """对冲等待时间：引擎历史延迟的百分位（样本不足时使用默认值）"""
+        tracker = self.engines[engine_name].latency
+        if len(tracker) < config.SEARCH_HEDGE_MIN_SAMPLES:
+            return config.SEARCH_HEDGE_DEFAULT_DELAY
+        delay = tracker.percentile(config.SEARCH_HEDGE_PERCENTILE)
+        return max(config.SEARCH_HEDGE_MIN_DELAY, delay)
+    
+    def _fetch_with(self, engine_name: str, query: str, num_results: int) -> Optional[List[Dict]]:
+        """请求单个引擎并记录熔断/延迟状态，失败返回 None"""
+        engine = self.engines[engine_name]
+        if not engine.breaker.allow_request():
+            return None
+        
+        started = time.monotonic()
+        try:
+            results = engine.fetch(query, num_results)
+        except Exception as e:
+            # 任何异常都要记录失败，否则半开状态的探测请求永远不会结束
+            engine.breaker.record_failure()
+            print(f"  ❌ {engine_name} 搜索失败: {e}")
+            return None
+        
+        engine.breaker.record_success()
+        engine.latency.record(time.monotonic() - started)
+        return results
     
     def search(self, query: str, num_results: int = 10) -> List[Dict]:
         """
-        多引擎搜索，自动降级
-        优先使用配置的引擎，失败后尝试其他引擎
+        多引擎搜索
+        优先使用配置的引擎；首选引擎响应过慢时对冲请求备用引擎，失败或无结果时降级
         """
-        # 尝试首选引擎
-        if self.preferred_engine in self.engines:
-            results = self.engines[self.preferred_engine].search(query, num_results)
-            if results:
-                return results
+        order = self._engine_order()
+        if not order:
+            print("  ⚠️  没有可用的搜索引擎")
+            return []
+        
+        # 缓存与引擎无关，查一次即可
+        cached = self.engines[order[0]].lookup_cache(query, num_results)
+        if cached is not None:
+            return cached
+        
+        pending = {
+            self._hedge_executor.submit(self._fetch_with, order[0], query, num_results): order[0]
+        }
+        next_index = 1
         
-        # 降级：尝试其他引擎
-        for engine_name, engine in self.engines.items():
-            if engine_name == self.preferred_engine:
+        while pending:
+            timeout = None
+            if next_index < len(order):
+                timeout = self._hedge_delay(order[next_index - 1])
+            
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                # 超时未返回：对冲请求下一个引擎
+                slow, hedge = order[next_index - 1], order[next_index]
+                print(f"  ⏱️  {slow} {timeout:.1f}s 未返回，对冲请求 {hedge}")
+                pending[self._hedge_executor.submit(self._fetch_with, hedge, query, num_results)] = hedge
+                next_index += 1
                 continue
             
-            print(f"  🔄 降级到 {engine_name}")
-            results = engine.search(query, num_results)
+            for future in done:
+                pending.pop(future)
+                results = future.result()
+                if results:
+                    return results
+            
+            # 已完成的引擎都失败或无结果：降级到下一个引擎
+            if not pending and next_index < len(order):
+                fallback = order[next_index]
+                print(f"  🔄 降级到 {fallback}")
+                pending[self._hedge_executor.submit(self._fetch_with, fallback, query, num_results)] = fallback
+                next_index += 1
+        
+        return []
+    
+    def refresh(
+        self,
+        query: str,
+        num_results: int = 10,
+        gl: Optional[str] = None,
+        hl: Optional[str] = None
+    ) -> List[Dict]:
+        """绕过缓存重新请求（按优先级降级），结果写回缓存，用于缓存预热"""
+        for name in self._engine_order():
+            engine = self.engines[name]
+            if not engine.breaker.allow_request():
+                continue
+            
+            try:
+                results = engine.fetch(query, num_results, gl, hl)
+            except Exception as e:
+                engine.breaker.record_failure()
+                print(f"  ❌ {name} 搜索失败: {e}")
+                continue
+            
+            engine.breaker.record_success()
             if results:
                 return results
         
         return []
     
-    def batch_search(self, queries: List[str], num_results: int = 10) -> Dict[str, List[Dict]]:
-        """批量搜索"""
-        results = {}
-        for query in queries:
+    def batch_search(
+        self,
+        queries: List[str],
+        num_results: int = 10,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        批量搜索
+        
+        1. 逐条查缓存，命中的查询不占用配额
+        2. 未命中的查询交给首选引擎的 fetch_many（Serper 合并为一次批量请求）
+        3. 批量失败或无结果的查询再并发走单条搜索（对冲 + 降级），
+           请求速率由各引擎的令牌桶控制（见 Config.*_RATE_LIMIT）
+        
+        Returns:
+            {query: results}，顺序与输入一致
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return {}
+        
+        for query in unique_queries:
             print(f"🔍 搜索: {query}")
-            results[query] = self.search(query, num_results)
-            time.sleep(1)  # 避免频繁请求
-        return results
+        
+        order = self._engine_order()
+        if not order:
+            print("  ⚠️  没有可用的搜索引擎")
+            return {query: [] for query in unique_queries}
+        
+        primary = self.engines[order[0]]
+        results = {}
+        misses = []
+        for query in unique_queries:
+            cached = primary.lookup_cache(query, num_results)
+            if cached is not None:
+                results[query] = cached
+            else:
+                misses.append(query)
+        
+        if len(misses) > 1 and primary.breaker.allow_request():
+            try:
+                fetched = primary.fetch_many(misses, num_results)
+                primary.breaker.record_success()
+            except Exception as e:
+                primary.breaker.record_failure()
+                print(f"  ❌ {primary.name} 批量搜索失败: {e}")
+                fetched = {}
+            
+            for query, query_results in fetched.items():
+                if query_results:
+                    results[query] = query_results
+            misses = [query for query in misses if query not in results]
+        
+        if misses:
+            max_workers = max_workers or config.SEARCH_MAX_WORKERS
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as executor:
+                futures = {executor.submit(self.search, query, num_results): query for query in misses}
+                
+                for future in as_completed(futures):
+                    query = futures[future]
+                    try:
+                        results[query] = future.result()
+                    except Exception as e:
+                        print(f"  ❌ 搜索失败 {query}: {e}")
+                        results[query] = []
+        
+        return {query: results[query] for query in unique_queries}
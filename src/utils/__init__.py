@@ -0,0 +1,16 @@
+"""
+Utils 模块
+"""
+from .rate_limiter import TokenBucket, get_rate_limiter
+from .circuit_breaker import CircuitBreaker, LatencyTracker
+from .http_client import HTTPClient, HTTPClientError, get_http_client
+
+__all__ = [
+    "TokenBucket",
+    "get_rate_limiter",
+    "CircuitBreaker",
+    "LatencyTracker",
+    "HTTPClient",
+    "HTTPClientError",
+    "get_http_client"
+]
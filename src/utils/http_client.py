@@ -0,0 +1,296 @@
+"""
+共享 HTTP 客户端（连接池 + 可选 HTTP/2）
+
+搜索、爬取、图片下载共用一个传输层，同一主机的请求复用 keep-alive 连接，
+避免每次调用都重新进行 TCP + TLS 握手
+"""
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from src.config import config
+
+
+class HTTPClientError(Exception):
+    """HTTP 请求失败（网络错误或非 2xx 状态码）"""
+    
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StreamResponse:
+    """流式响应（统一 requests / httpx 的分块读取接口）"""
+    
+    def __init__(self, response: Any, backend: str):
+        self._response = response
+        self._backend = backend
+        self.status_code = response.status_code
+        self.headers = response.headers
+    
+    def iter_bytes(self, chunk_size: int = 65536) -> Iterator[bytes]:
+        """分块读取响应体"""
+        try:
+            if self._backend == "httpx":
+                yield from self._response.iter_bytes(chunk_size)
+            else:
+                yield from self._response.iter_content(chunk_size)
+        except Exception as e:
+            raise HTTPClientError(str(e)) from e
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    在每次真正建立 socket 连接时回调的 HTTPAdapter
+    
+    urllib3 连接池的 num_connections 只统计新建的连接对象，
+    keep-alive 连接被服务端断开后原对象重新 connect() 不会计入
+    """
+    
+    def __init__(self, on_connect: Callable[[str, Optional[int], int], None], **kwargs):
+        self._on_connect = on_connect
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        on_connect = self._on_connect
+        
+        class CountingHTTPConnection(HTTPConnection):
+            def connect(self):
+                super().connect()
+                on_connect(self.host, self.port, 80)
+        
+        class CountingHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                super().connect()
+                on_connect(self.host, self.port, 443)
+        
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = CountingHTTPConnection
+        
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = CountingHTTPSConnection
+        
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+class HTTPClient:
+    """
+    共享 HTTP 客户端
+    
+    - backend="requests"：requests.Session + 按主机划分的 urllib3 连接池
+    - backend="httpx"：httpx.Client，安装了 h2 时可启用 HTTP/2
+    
+    返回的响应对象是底层库的原生响应，两者共有 status_code / headers / text / content / json()
+    """
+    
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        http2: Optional[bool] = None,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None
+    ):
+        self.backend = backend or config.HTTP_BACKEND
+        self.pool_connections = pool_connections or config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or config.HTTP_POOL_MAXSIZE
+        self.http2 = config.HTTP2_ENABLED if http2 is None else http2
+        
+        self._requests: Dict[str, int] = defaultdict(int)
+        self._connections: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        
+        if self.backend == "httpx":
+            self._client = self._create_httpx_client()
+        else:
+            self.backend = "requests"
+            self._client = self._create_requests_session()
+    
+    def _create_requests_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = _CountingAdapter(
+            self._record_connection,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def _record_connection(self, host: str, port: Optional[int], default_port: int):
+        host = host.lower()
+        if port and port != default_port:
+            host = f"{host}:{port}"
+        with self._lock:
+            self._connections[host] += 1
+    
+    def _create_httpx_client(self):
+        import httpx
+        
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("  ⚠️  未安装 h2，HTTP/2 已禁用 (pip install httpx[http2])")
+                self.http2 = False
+        
+        limits = httpx.Limits(
+            max_connections=self.pool_connections * self.pool_maxsize,
+            max_keepalive_connections=self.pool_connections * self.pool_maxsize,
+            keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+        )
+        return httpx.Client(http2=self.http2, limits=limits, follow_redirects=True)
+    
+    def get(self, url: str, **kwargs) -> Any:
+        return self.request("GET", url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> Any:
+        return self.request("POST", url, **kwargs)
+    
+    def request(self, method: str, url: str, raise_for_status: bool = True, **kwargs) -> Any:
+        """
+        发送请求
+        
+        Args:
+            raise_for_status: 非 2xx 状态码时抛出 HTTPClientError
+        
+        Raises:
+            HTTPClientError: 网络错误或状态码错误
+        """
+        host = urlparse(url).netloc.lower()
+        kwargs.setdefault("timeout", config.REQUEST_TIMEOUT)
+        
+        with self._lock:
+            self._requests[host] += 1
+        
+        if self.backend == "httpx":
+            response = self._request_httpx(method, url, host, **kwargs)
+        else:
+            response = self._request_requests(method, url, **kwargs)
+        
+        self._check_status(response, url, raise_for_status)
+        return response
+    
+    @contextmanager
+    def stream(self, method: str, url: str, raise_for_status: bool = True, **kwargs) -> Iterator[StreamResponse]:
+        """
+        流式请求，响应体不会一次性读入内存
+        
+        用法:
+            with client.stream("GET", url) as response:
+                for chunk in response.iter_bytes():
+                    ...
+        """
+        host = urlparse(url).netloc.lower()
+        kwargs.setdefault("timeout", config.REQUEST_TIMEOUT)
+        
+        with self._lock:
+            self._requests[host] += 1
+        
+        if self.backend == "httpx":
+            import httpx
+            
+            try:
+                with self._client.stream(method, url, **self._httpx_kwargs(host, kwargs)) as response:
+                    self._check_status(response, url, raise_for_status)
+                    yield StreamResponse(response, self.backend)
+            except httpx.HTTPError as e:
+                raise HTTPClientError(str(e)) from e
+        else:
+            response = self._request_requests(method, url, stream=True, **kwargs)
+            try:
+                self._check_status(response, url, raise_for_status)
+                yield StreamResponse(response, self.backend)
+            finally:
+                response.close()
+    
+    @staticmethod
+    def _check_status(response: Any, url: str, raise_for_status: bool):
+        if raise_for_status and response.status_code >= 400:
+            raise HTTPClientError(
+                f"{response.status_code} Error for url: {url}",
+                status_code=response.status_code
+            )
+    
+    def _request_requests(self, method: str, url: str, **kwargs):
+        try:
+            return self._client.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            raise HTTPClientError(str(e)) from e
+    
+    def _request_httpx(self, method: str, url: str, host: str, **kwargs):
+        import httpx
+        
+        try:
+            return self._client.request(method, url, **self._httpx_kwargs(host, kwargs))
+        except httpx.HTTPError as e:
+            raise HTTPClientError(str(e)) from e
+    
+    def _httpx_kwargs(self, host: str, kwargs: Dict) -> Dict:
+        """补充连接追踪回调，去掉 httpx 不支持的参数"""
+        def trace(event_name: str, info: Dict):
+            # 只有新建连接才会触发 connect_tcp 事件，复用的连接不会
+            if event_name == "connection.connect_tcp.complete":
+                with self._lock:
+                    self._connections[host] += 1
+        
+        kwargs = dict(kwargs)
+        kwargs["extensions"] = {**kwargs.get("extensions", {}), "trace": trace}
+        kwargs.pop("allow_redirects", None)
+        return kwargs
+    
+    def stats(self) -> Dict[str, Dict]:
+        """
+        按主机统计请求数与新建连接数
+        
+        Returns:
+            {host: {"requests": n, "connections": m, "reused": n - m}}
+        """
+        stats = {}
+        with self._lock:
+            for host, count in self._requests.items():
+                opened = self._connections.get(host, self._connections.get(host.split(":")[0], 0))
+                stats[host] = {
+                    "requests": count,
+                    "connections": opened,
+                    "reused": max(0, count - opened)
+                }
+        return stats
+    
+    def print_stats(self):
+        """打印连接复用统计"""
+        stats = self.stats()
+        if not stats:
+            return
+        
+        total_requests = sum(s["requests"] for s in stats.values())
+        total_reused = sum(s["reused"] for s in stats.values())
+        print(f"🔌 HTTP 连接复用: {total_reused}/{total_requests} 次请求复用已有连接 ({self.backend}{', HTTP/2' if self.http2 else ''})")
+        for host, s in sorted(stats.items(), key=lambda item: -item[1]["requests"]):
+            print(f"   {host}: 请求 {s['requests']} | 新建连接 {s['connections']}")
+    
+    def close(self):
+        self._client.close()
+
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """获取进程内共享的 HTTP 客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
@@ -0,0 +1,80 @@
+"""
+令牌桶限流器
+"""
+import threading
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数（<=0 表示不限流）
+            capacity: 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+    
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """尝试立即获取令牌，不阻塞"""
+        if self.rate <= 0:
+            return True
+        
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+    
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        阻塞直到获取令牌
+        
+        Returns:
+            等待的秒数
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            
+            time.sleep(wait)
+            waited += wait
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: float, capacity: int = 1) -> TokenBucket:
+    """
+    获取进程内共享的限流器
+    
+    同名限流器只创建一次，保证同一个服务商的配额在所有实例间共享
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(rate, capacity)
+            _limiters[name] = limiter
+        return limiter